@@ -0,0 +1,145 @@
+import os
+import json
+import base64
+import hashlib
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+ASSET_MODES = ("off", "record", "replay")
+UNKNOWN_HOST_POLICIES = ("passthrough", "stub", "block")
+
+# 1x1 transparent PNG served in place of unknown images
+STUB_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+
+class AssetCache:
+    """
+    HAR-style record/replay store for external requests made during capture.
+
+    index.json maps each "METHOD url" to the sha256 of its body plus status and content
+    type; bodies live once per hash under blobs/. In replay mode nothing leaves the machine.
+    Indexes written before methods were recorded (bare URL keys) replay as GET.
+    """
+
+    def __init__(self, store_dir: str, mode: str = "replay", unknown_hosts: str = "stub",
+                 local_hosts: Optional[set] = None):
+        if mode not in ASSET_MODES:
+            raise ValueError(f"Unknown asset cache mode '{mode}', expected one of {ASSET_MODES}")
+        if unknown_hosts not in UNKNOWN_HOST_POLICIES:
+            raise ValueError(f"Unknown host policy '{unknown_hosts}', expected one of {UNKNOWN_HOST_POLICIES}")
+        self.store_dir = store_dir
+        self.blob_dir = os.path.join(store_dir, "blobs")
+        self.index_path = os.path.join(store_dir, "index.json")
+        self.mode = mode
+        self.unknown_hosts = unknown_hosts
+        self.local_hosts = local_hosts or {"localhost", "127.0.0.1"}
+        self.index = self._load_index()
+        self.stats = {"replayed": 0, "recorded": 0, "record_failed": 0, "stubbed": 0, "blocked": 0, "passthrough": 0}
+        self._dirty = False
+
+    def _load_index(self) -> Dict:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, "r") as f:
+                return json.load(f)
+        except json.JSONDecodeError:
+            print(f"[✗] Asset index {self.index_path} is corrupted. Starting empty.")
+            return {}
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        os.makedirs(self.store_dir, exist_ok=True)
+        with open(self.index_path, "w") as f:
+            json.dump(self.index, f, indent=2, sort_keys=True)
+        self._dirty = False
+        print(f"[✓] Asset index saved ({len(self.index)} entries)")
+
+    def is_external(self, url: str) -> bool:
+        parts = urlsplit(url)
+        return parts.scheme in ("http", "https") and parts.hostname not in self.local_hosts
+
+    @staticmethod
+    def _key(method: str, url: str) -> str:
+        return f"{(method or 'GET').upper()} {url}"
+
+    def _lookup(self, method: str, url: str) -> Optional[Dict]:
+        entry = self.index.get(self._key(method, url))
+        if entry is None and (method or "GET").upper() == "GET":
+            entry = self.index.get(url)
+        return entry
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest)
+
+    def _store(self, key: str, status: int, content_type: str, body: bytes) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            os.makedirs(self.blob_dir, exist_ok=True)
+            with open(blob_path, "wb") as f:
+                f.write(body)
+        self.index[key] = {"sha256": digest, "status": status, "content_type": content_type}
+        self._dirty = True
+
+    def _replay(self, route, entry: Dict) -> bool:
+        blob_path = self._blob_path(entry["sha256"])
+        if not os.path.exists(blob_path):
+            return False
+        with open(blob_path, "rb") as f:
+            body = f.read()
+        route.fulfill(
+            status=entry.get("status", 200),
+            body=body,
+            headers={"content-type": entry.get("content_type", "application/octet-stream"),
+                     "access-control-allow-origin": "*"}
+        )
+        self.stats["replayed"] += 1
+        return True
+
+    def _handle_unknown(self, route) -> None:
+        if self.unknown_hosts == "block":
+            route.abort("blockedbyclient")
+            self.stats["blocked"] += 1
+        elif self.unknown_hosts == "stub":
+            if route.request.resource_type == "image":
+                route.fulfill(status=200, body=STUB_PNG, content_type="image/png")
+            else:
+                route.fulfill(status=200, body=b"", content_type="text/plain")
+            self.stats["stubbed"] += 1
+        else:
+            route.continue_()
+            self.stats["passthrough"] += 1
+
+    def handle(self, route) -> None:
+        """Route handler for an external request."""
+        url, method = route.request.url, route.request.method
+
+        if self.mode == "replay":
+            entry = self._lookup(method, url)
+            if entry is None or not self._replay(route, entry):
+                print(f"[!] No recorded asset for {method} {url}, applying '{self.unknown_hosts}' policy")
+                self._handle_unknown(route)
+            return
+
+        if self.mode == "record":
+            try:
+                response = route.fetch()
+                body = response.body()
+            except Exception as e:
+                # An unfulfilled route would stall the capture until its timeout
+                print(f"[!] Could not record {method} {url} ({e}), applying '{self.unknown_hosts}' policy")
+                self.stats["record_failed"] += 1
+                self._handle_unknown(route)
+                return
+            content_type = response.headers.get("content-type", "application/octet-stream")
+            self._store(self._key(method, url), response.status, content_type, body)
+            route.fulfill(response=response, body=body)
+            self.stats["recorded"] += 1
+            return
+
+        route.continue_()
+        self.stats["passthrough"] += 1
@@ -2,8 +2,10 @@ import os
 import json
 from dataclasses import dataclass
 from typing import Dict, List, Optional
+from urllib.parse import urlsplit, unquote
 from playwright.sync_api import sync_playwright, TimeoutError
-from config import TEST_URLS
+from config import TEST_URLS, DIST_DIR, OFFLINE_ORIGIN, READY_SELECTOR, ASSET_CACHE_DIR
+from asset_cache import AssetCache
 from git_utils import is_ui_only_commit
 # DUMMY
 CURRENT_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -18,10 +20,52 @@ class CaptureResult:
 class PageCapturer:
     """Handles screenshot and DOM capture for web pages."""
     
-    def __init__(self, output_dir: str):
+    def __init__(self, output_dir: str, dist_dir: Optional[str] = None, ready_selector: str = READY_SELECTOR,
+                 asset_cache: Optional[AssetCache] = None):
         self.output_dir = output_dir
         self.viewport = {"width": 1280, "height": 800}
         self.timeout = 15000
+        # When set, pages are served from the built frontend on disk via request routing
+        self.dist_dir = os.path.abspath(dist_dir) if dist_dir else None
+        self.ready_selector = ready_selector
+        # When set, external requests are recorded to / replayed from a local content store
+        self.asset_cache = asset_cache
+
+    @staticmethod
+    def offline_url(url: str) -> str:
+        """Map a dev-server URL onto the offline origin, keeping path and query."""
+        parts = urlsplit(url)
+        query = f"?{parts.query}" if parts.query else ""
+        return f"{OFFLINE_ORIGIN}{parts.path or '/'}{query}"
+
+    def _serve_dist(self, route, path: str) -> None:
+        """Fulfil a request from dist/, falling back to index.html for client-side routes."""
+        file_path = os.path.abspath(os.path.join(self.dist_dir, unquote(path).lstrip("/")))
+        if not file_path.startswith(self.dist_dir + os.sep) or not os.path.isfile(file_path):
+            if os.path.splitext(path)[1]:
+                route.fulfill(status=404, body="")
+                return
+            file_path = os.path.join(self.dist_dir, "index.html")
+        route.fulfill(status=200, path=file_path)
+
+    def _handle_route(self, route) -> None:
+        url = route.request.url
+        if self.dist_dir and url.startswith(OFFLINE_ORIGIN):
+            self._serve_dist(route, urlsplit(url).path)
+        elif self.asset_cache and self.asset_cache.is_external(url):
+            self.asset_cache.handle(route)
+        else:
+            route.continue_()
+
+    def _wait_until_ready(self, page) -> None:
+        """Explicit readiness: fonts loaded, app root rendered and all images decoded."""
+        page.wait_for_function(
+            """(selector) => document.fonts.status === 'loaded'
+                && document.querySelector(selector) !== null
+                && Array.from(document.images).every(img => img.complete)""",
+            arg=self.ready_selector,
+            timeout=self.timeout
+        )
         
     def _prepare_environment(self, page) -> None:
         """Remove animations and wait for fonts to load."""
@@ -90,9 +134,15 @@ class PageCapturer:
                     device_scale_factor=1,
                     is_mobile=False
                 )
+                if self.dist_dir or self.asset_cache:
+                    context.route("**/*", self._handle_route)
                 page = context.new_page()
                 
-                page.goto(url, wait_until="networkidle", timeout=self.timeout)
+                if self.dist_dir:
+                    page.goto(self.offline_url(url), wait_until="domcontentloaded", timeout=self.timeout)
+                    self._wait_until_ready(page)
+                else:
+                    page.goto(url, wait_until="networkidle", timeout=self.timeout)
                 self._prepare_environment(page)
                 
                 page.screenshot(path=screenshot_path, full_page=True)
@@ -100,6 +150,9 @@ class PageCapturer:
                 
                 with open(dom_path, 'w') as f:
                     json.dump(dom_snapshot, f, indent=2)
+
+                if self.asset_cache:
+                    self.asset_cache.save()
                     
                 return CaptureResult(
                     screenshot_path=screenshot_path,
@@ -119,11 +172,21 @@ class PageCapturer:
             error=error
         )
 
-def save_page_snapshots(commit_hash: str) -> Optional[Dict[str, CaptureResult]]:
-    """Save snapshots for all test URLs if UI changes exist."""
+def save_page_snapshots(commit_hash: str, offline: bool = False, dist_dir: str = DIST_DIR,
+                        asset_mode: str = "off", unknown_hosts: str = "stub") -> Optional[Dict[str, CaptureResult]]:
+    """Save snapshots for all test URLs if UI changes exist.
+
+    With offline=True the built frontend in dist_dir is served from disk, no dev server needed.
+    asset_mode="record" stores external responses in ASSET_CACHE_DIR, "replay" serves them back
+    and handles anything unrecorded according to unknown_hosts ("passthrough", "stub", "block").
+    """
     
     baseline_dir = os.path.join(CURRENT_DIR, 'baseline', commit_hash)
-    capturer = PageCapturer(baseline_dir)
+    if offline and not os.path.isfile(os.path.join(dist_dir, "index.html")):
+        print(f"✗ No built frontend at {dist_dir}, run `npm run build` in vt-ai-fe first")
+        return None
+    asset_cache = AssetCache(ASSET_CACHE_DIR, asset_mode, unknown_hosts) if asset_mode != "off" else None
+    capturer = PageCapturer(baseline_dir, dist_dir=dist_dir if offline else None, asset_cache=asset_cache)
     results = {}
 
     for name, url in TEST_URLS.items():
@@ -137,4 +200,24 @@ def save_page_snapshots(commit_hash: str) -> Optional[Dict[str, CaptureResult]]:
             
         results[name] = result
 
-    return results
\ No newline at end of file
+    if asset_cache:
+        print(f"Asset cache: {asset_cache.stats}")
+
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Capture screenshots and DOM snapshots for a commit.")
+    parser.add_argument("commit_hash")
+    parser.add_argument("--offline", action="store_true",
+                        help="Serve the built frontend from --dist-dir instead of the dev server")
+    parser.add_argument("--dist-dir", default=DIST_DIR)
+    parser.add_argument("--asset-mode", choices=("off", "record", "replay"), default="off")
+    parser.add_argument("--unknown-hosts", choices=("passthrough", "stub", "block"), default="stub")
+    args = parser.parse_args()
+
+    results = save_page_snapshots(args.commit_hash, offline=args.offline, dist_dir=args.dist_dir,
+                                  asset_mode=args.asset_mode, unknown_hosts=args.unknown_hosts)
+    if not results or not all(r.success for r in results.values()):
+        raise SystemExit(1)
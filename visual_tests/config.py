@@ -1,3 +1,14 @@
+import os
+
 TEST_URLS = {
     'test_home_page' :"http://localhost:5173/" 
-}
\ No newline at end of file
+}
+
+# Offline capture: serve the built frontend from disk instead of the dev server
+DIST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "vt-ai-fe", "dist")
+OFFLINE_ORIGIN = "http://vt-ai.local"
+# Set by vt-ai-fe/src/main.jsx once the app has committed its first render
+READY_SELECTOR = "#root[data-vt-ready]"
+
+# Record/replay store for third-party assets requested during capture
+ASSET_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "asset_store")
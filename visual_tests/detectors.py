@@ -0,0 +1,194 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+# A tier verdict: True = changed, False = unchanged, None = ambiguous (defer to next tier)
+Verdict = Tuple[Optional[bool], Dict[str, float]]
+
+
+class ExactHashTier:
+    """Accepts crops whose pixels are byte-for-byte identical."""
+    name = "hash"
+
+    def evaluate(self, crop_prev: Image.Image, crop_curr: Image.Image) -> Verdict:
+        if crop_prev.size == crop_curr.size and crop_prev.mode == crop_curr.mode:
+            if crop_prev.tobytes() == crop_curr.tobytes():
+                return False, {}
+        return None, {}
+
+
+class SSIMTier:
+    """
+    Structural similarity per RGB channel, computed with box-filtered NumPy arrays.
+
+    Accepts only when every local window of every channel is similar (minimum windowed
+    SSIM) and no pixel moved by more than max_pixel_diff levels, so small text changes,
+    recolours and flat brightness changes are never accepted here. Rejects only when the
+    crop is dissimilar overall (mean SSIM).
+
+    The accept defaults are deliberately conservative rather than calibrated on labelled
+    diffs: they pass rendering noise (anti-aliasing, off-by-a-few colour rounding) and defer
+    anything else to the model tiers.
+    """
+    name = "ssim"
+
+    def __init__(self, accept_above: float = 0.99, reject_below: float = 0.5, window: int = 7,
+                 max_pixel_diff: int = 8):
+        self.accept_above = accept_above
+        self.reject_below = reject_below
+        self.window = window
+        self.max_pixel_diff = max_pixel_diff
+
+    @staticmethod
+    def _box_mean(a: np.ndarray, win: int) -> np.ndarray:
+        c = np.pad(a, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+        s = c[win:, win:] - c[:-win, win:] - c[win:, :-win] + c[:-win, :-win]
+        return s / (win * win)
+
+    @staticmethod
+    def _rgb(crop: Image.Image) -> np.ndarray:
+        return np.asarray(crop.convert("RGB"), dtype=np.float64)
+
+    def _channel_map(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        win = max(1, min(self.window, a.shape[0], a.shape[1]))
+        c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+
+        mu_a, mu_b = self._box_mean(a, win), self._box_mean(b, win)
+        var_a = self._box_mean(a * a, win) - mu_a * mu_a
+        var_b = self._box_mean(b * b, win) - mu_b * mu_b
+        cov = self._box_mean(a * b, win) - mu_a * mu_b
+
+        return ((2 * mu_a * mu_b + c1) * (2 * cov + c2)) / \
+               ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+
+    def ssim_map(self, crop_prev: Image.Image, crop_curr: Image.Image) -> Optional[np.ndarray]:
+        """Windowed SSIM stacked per RGB channel, shape (3, rows, cols); None if sizes differ."""
+        a, b = self._rgb(crop_prev), self._rgb(crop_curr)
+        if a.shape != b.shape:
+            return None
+        return self._rgb_map(a, b)
+
+    def _rgb_map(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return np.stack([self._channel_map(a[..., c], b[..., c]) for c in range(3)])
+
+    def ssim(self, crop_prev: Image.Image, crop_curr: Image.Image) -> float:
+        ssim_map = self.ssim_map(crop_prev, crop_curr)
+        return float(ssim_map.mean()) if ssim_map is not None else 0.0
+
+    def evaluate(self, crop_prev: Image.Image, crop_curr: Image.Image) -> Verdict:
+        a, b = self._rgb(crop_prev), self._rgb(crop_curr)
+        if a.shape != b.shape:
+            return None, {}
+        ssim_map = self._rgb_map(a, b)
+        scores = {
+            "SSIM": float(ssim_map.mean()),
+            "SSIM_min": float(ssim_map.min()),
+            "Max_Diff": float(np.abs(a - b).max())
+        }
+        if scores["SSIM_min"] >= self.accept_above and scores["Max_Diff"] <= self.max_pixel_diff:
+            return False, scores
+        if scores["SSIM"] < self.reject_below:
+            return True, scores
+        return None, scores
+
+
+class LPIPSTier:
+    """Rejects on LPIPS distance above threshold; optionally accepts clearly-similar crops."""
+    name = "lpips"
+    is_model = True
+
+    def __init__(self, lpips_model, thresh: float = 0.03, accept_below: Optional[float] = None):
+        self.lpips_model = lpips_model
+        self.thresh = thresh
+        self.accept_below = accept_below
+
+    def evaluate(self, crop_prev: Image.Image, crop_curr: Image.Image) -> Verdict:
+        score = self.lpips_model.compute_distance(crop_prev, crop_curr)
+        if score > self.thresh:
+            return True, {"LPIPS": score}
+        if self.accept_below is not None and score < self.accept_below:
+            return False, {"LPIPS": score}
+        return None, {"LPIPS": score}
+
+
+class CLIPTier:
+    """Final tier: CLIP similarity below threshold means changed."""
+    name = "clip"
+    is_model = True
+
+    def __init__(self, clip_model, thresh: float = 0.98):
+        self.clip_model = clip_model
+        self.thresh = thresh
+
+    def evaluate(self, crop_prev: Image.Image, crop_curr: Image.Image) -> Verdict:
+        score = self.clip_model.compute_similarity(crop_prev, crop_curr)
+        return score < self.thresh, {"CLIP": score}
+
+
+class LazyModel:
+    """Defers building a model (and importing torch) until a tier actually calls it."""
+    __slots__ = ("_factory", "_model")
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._model = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def __getattr__(self, name):
+        # Private/dunder lookups (copy, pickle, unset slots) must not trigger a load or recurse
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._model is None:
+            print(f"⏳ Loading model via {getattr(self._factory, '__name__', self._factory)}")
+            self._model = self._factory()
+        return getattr(self._model, name)
+
+
+class DetectorCascade:
+    """Runs tiers in cost order; each element stops at the first tier that decides."""
+
+    def __init__(self, tiers: List, full_model_scores: bool = False):
+        if not tiers:
+            raise ValueError("DetectorCascade needs at least one tier")
+        self.tiers = tiers
+        # Keep scoring the remaining model tiers after a model tier decides, so stored
+        # scores can be re-evaluated at any threshold (see score_store.reevaluate)
+        self.full_model_scores = full_model_scores
+        self.hits = {tier.name: 0 for tier in tiers}
+
+    def reset_counts(self) -> None:
+        self.hits = {tier.name: 0 for tier in self.tiers}
+
+    def evaluate(self, crop_prev: Image.Image, crop_curr: Image.Image) -> Tuple[bool, Dict[str, float], str]:
+        """Returns (is_changed, scores collected so far, name of the deciding tier)."""
+        scores = {}
+        for i, tier in enumerate(self.tiers):
+            decision, tier_scores = tier.evaluate(crop_prev, crop_curr)
+            scores.update(tier_scores)
+            if decision is not None:
+                self.hits[tier.name] += 1
+                if self.full_model_scores and getattr(tier, "is_model", False):
+                    for rest in self.tiers[i + 1:]:
+                        if getattr(rest, "is_model", False):
+                            scores.update(rest.evaluate(crop_prev, crop_curr)[1])
+                return decision, scores, tier.name
+
+        # Last tier stayed ambiguous: treat as unchanged but still count it
+        last = self.tiers[-1].name
+        self.hits[last] += 1
+        return False, scores, last
+
+
+def build_default_cascade(lpips_model, clip_model, lpips_thresh: float = 0.03, clip_thresh: float = 0.98,
+                          ssim_accept: float = 0.99, ssim_reject: float = 0.5,
+                          lpips_accept: Optional[float] = None, full_model_scores: bool = False) -> DetectorCascade:
+    """hash -> SSIM -> LPIPS -> CLIP, matching VisualComparator's original LPIPS/CLIP decision rule."""
+    return DetectorCascade([
+        ExactHashTier(),
+        SSIMTier(accept_above=ssim_accept, reject_below=ssim_reject),
+        LPIPSTier(lpips_model, thresh=lpips_thresh, accept_below=lpips_accept),
+        CLIPTier(clip_model, thresh=clip_thresh),
+    ], full_model_scores=full_model_scores)
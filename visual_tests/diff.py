@@ -1,6 +1,10 @@
-from typing import Dict, List, Tuple, Optional
-import pandas as pd
+import hashlib
+from typing import Container, Dict, List, Tuple, Optional
 from PIL import Image, ImageDraw
+from detectors import DetectorCascade, build_default_cascade
+from layout_shift import LayoutShiftEstimator, ShiftMap
+from score_store import build_score_columns
+from result_table import ResultTable
 
 def mask_children(image: Image.Image, element: Dict, dom_map: Dict, offset_x: int = 0, offset_y: int = 0) -> None:
     """Masks child elements of the given element in the image."""
@@ -20,12 +24,21 @@ def mask_children(image: Image.Image, element: Dict, dom_map: Dict, offset_x: in
                 print(f"    ⚠️ Failed to mask child {child_id}: {e}")
 
 class VisualComparator:
-    def __init__(self, lpips_model, clip_model, lpips_thresh: float = 0.03, clip_thresh: float = 0.98, min_size: int = 20):
+    def __init__(self, lpips_model, clip_model, lpips_thresh: float = 0.03, clip_thresh: float = 0.98, min_size: int = 20,
+                 cascade: Optional[DetectorCascade] = None, shift_estimator: Optional[LayoutShiftEstimator] = None,
+                 detect_shifts: bool = True, full_model_scores: bool = False):
         self.lpips_model = lpips_model
         self.clip_model = clip_model
         self.lpips_thresh = lpips_thresh
         self.clip_thresh = clip_thresh
         self.min_size = min_size
+        # full_model_scores keeps both LPIPS and CLIP for every model-scored element, so stored
+        # raw scores can be re-evaluated at any threshold (see score_store.reevaluate)
+        self.cascade = cascade or build_default_cascade(lpips_model, clip_model, lpips_thresh, clip_thresh,
+                                                        full_model_scores=full_model_scores)
+        self.shift_estimator = (shift_estimator or LayoutShiftEstimator()) if detect_shifts else None
+        self.dedup_hits = 0
+        print(f"🪜 Detector cascade: {' -> '.join(tier.name for tier in self.cascade.tiers)}")
         print(f"🔧 Initialized VisualComparator with thresholds: LPIPS={lpips_thresh}, CLIP={clip_thresh}, min_size={min_size}")
 
     def _initialize_images(self, prev_pair: Dict, curr_pair: Dict) -> Tuple[Image.Image, ImageDraw.Draw, Image.Image, ImageDraw.Draw]:
@@ -84,36 +97,92 @@ class VisualComparator:
         return valid
 
     def _create_result_record(self, element: Dict, bbox: Tuple[int, int, int, int], 
-                            is_changed: bool, lp_score: float = None, clip_score: float = None) -> Dict:
+                            is_changed: bool, lp_score: float = None, clip_score: float = None,
+                            tier: str = None, curr_bbox: Tuple[int, int, int, int] = None) -> Dict:
         """Create a comprehensive result record with all metrics."""
+        curr_bbox = curr_bbox or bbox
         record = {
             "tag": element.get("tag", ""),
             "text": element.get("text", ""),
             "bbox": bbox,
-            "Change_Flag": int(is_changed)
+            "curr_bbox": curr_bbox,
+            "Shift": (curr_bbox[0] - bbox[0], curr_bbox[1] - bbox[1]) if curr_bbox != bbox else None,
+            "Change_Flag": int(is_changed),
+            "Tier": tier
         }
-        
-        if lp_score is not None and clip_score is not None:
-            record.update({
-                "LPIPS": round(lp_score, 4),
-                "CLIP": round(clip_score, 4),
-                "LPIPS_Detects_Change": int(lp_score > self.lpips_thresh),
-                "CLIP_Detects_Change": int(clip_score < self.clip_thresh)
-            })
-        
+        record.update(self._score_fields(lp_score, clip_score))
         return record
 
+    def _score_fields(self, lp_score: Optional[float], clip_score: Optional[float]) -> Dict:
+        """Model score columns; tiers that were never reached are reported as None."""
+        return {
+            "LPIPS": round(lp_score, 4) if lp_score is not None else None,
+            "CLIP": round(clip_score, 4) if clip_score is not None else None,
+            "LPIPS_Detects_Change": int(lp_score > self.lpips_thresh) if lp_score is not None else 0,
+            "CLIP_Detects_Change": int(clip_score < self.clip_thresh) if clip_score is not None else 0
+        }
+
+    @staticmethod
+    def _format_score(score: Optional[float]) -> str:
+        return f"{score:.3f}" if score is not None else "-"
+
+    @staticmethod
+    def _crop_pair_key(crop_prev: Image.Image, crop_curr: Image.Image) -> Tuple:
+        """Pixel-content key of a crop pair; repeated components share the same key."""
+        return (
+            crop_prev.size, crop_curr.size,
+            hashlib.blake2b(crop_prev.tobytes(), digest_size=16).digest(),
+            hashlib.blake2b(crop_curr.tobytes(), digest_size=16).digest()
+        )
+
+    def _compare_boxes(self, el_prev: Dict, el_curr: Dict, prev_size: Tuple[int, int], curr_size: Tuple[int, int],
+                       shift_map: Optional[ShiftMap] = None) -> Optional[Tuple[Tuple, Tuple]]:
+        """(prev bbox, curr bbox) an element pair is compared at, or None if its bbox is unusable."""
+        bbox = self._get_element_bbox(el_prev)
+        if not self._is_valid_bbox(bbox, prev_size):
+            return None
+        curr_bbox = bbox
+        if shift_map is not None:
+            curr_bbox = shift_map.shifted_bbox(el_prev, el_curr, bbox)
+            if curr_bbox != bbox and not self._is_valid_bbox(curr_bbox, curr_size):
+                curr_bbox = bbox
+        return bbox, curr_bbox
+
+    def _evaluate_crops(self, crop_prev: Image.Image, crop_curr: Image.Image, memo: Dict,
+                        count_hit: bool = True) -> Tuple[bool, Dict, str]:
+        """Run the cascade once per unique crop pair and fan the verdict out to identical pairs.
+
+        count_hit=False keeps a reuse out of dedup_hits (the masked pass re-finding an element's own pair).
+        """
+        key = self._crop_pair_key(crop_prev, crop_curr)
+        if key in memo:
+            if count_hit:
+                self.dedup_hits += 1
+            return memo[key]
+        memo[key] = self.cascade.evaluate(crop_prev, crop_curr)
+        return memo[key]
+
     def _compare_elements(self, prev_img: Image.Image, curr_img: Image.Image, 
-                         prev_dom: List[Dict], curr_dom: List[Dict]) -> Tuple[List[Dict], List[Tuple]]:
-        """Perform the two-pass comparison of DOM elements."""
+                         prev_dom: List[Dict], curr_dom: List[Dict],
+                         shift_map: Optional[ShiftMap] = None,
+                         raw_rows: Optional[List[Dict]] = None,
+                         indices: Optional[Container[int]] = None) -> Tuple[List[Dict], List[Tuple]]:
+        """Perform the two-pass comparison of DOM elements.
+
+        If raw_rows is given it receives one entry per result with the unrounded scores of both passes.
+        If indices is given only those element pairs are scored (the full DOM is still used for masking).
+        """
         print("\n🔍 Starting first pass (unmasked comparison)")
         results = []
         changed_elements = []
+        verdicts = {}
         elements_with_children = 0
         total_elements = 0
 
         # First pass - unmasked comparison
-        for el_prev, el_curr in zip(prev_dom, curr_dom):
+        for index, (el_prev, el_curr) in enumerate(zip(prev_dom, curr_dom)):
+            if indices is not None and index not in indices:
+                continue
             total_elements += 1
             if el_prev.get("tag") != el_curr.get("tag"):
                 print(f"  ↪️ Tag mismatch: {el_prev.get('tag')} vs {el_curr.get('tag')}")
@@ -125,31 +194,44 @@ class VisualComparator:
                     print(f"  ⏩ Skipped small element: {el_prev.get('tag')} ({w}x{h})")
                     continue
 
-                bbox = self._get_element_bbox(el_prev)
-                if not self._is_valid_bbox(bbox, prev_img.size):
+                boxes = self._compare_boxes(el_prev, el_curr, prev_img.size, curr_img.size, shift_map)
+                if boxes is None:
                     continue
+                bbox, curr_bbox = boxes
 
                 if el_prev.get("children"):
                     elements_with_children += 1
 
-                crop_prev, crop_curr = prev_img.crop(bbox), curr_img.crop(bbox)
-                lp_score = self.lpips_model.compute_distance(crop_prev, crop_curr)
-                clip_score = self.clip_model.compute_similarity(crop_prev, crop_curr)
-                is_changed = (lp_score > self.lpips_thresh) or (clip_score < self.clip_thresh)
+                crop_prev, crop_curr = prev_img.crop(bbox), curr_img.crop(curr_bbox)
+                is_changed, scores, tier = self._evaluate_crops(crop_prev, crop_curr, verdicts)
+                lp_score, clip_score = scores.get("LPIPS"), scores.get("CLIP")
 
                 results.append(self._create_result_record(
-                    el_prev, bbox, is_changed, lp_score, clip_score
+                    el_prev, bbox, is_changed, lp_score, clip_score, tier, curr_bbox
                 ))
+                if raw_rows is not None:
+                    raw_rows.append({
+                        "index": index,
+                        "tag": el_prev.get("tag", ""),
+                        "bbox": bbox,
+                        "size": (w, h),
+                        "lpips": [lp_score, None],
+                        "clip": [clip_score, None],
+                        "tier": [tier, None],
+                        "changed": [is_changed, None]
+                    })
                 
                 if is_changed:
-                    changed_elements.append((el_prev, el_curr, bbox, lp_score, clip_score))
-                    print(f"  🔴 Change detected: {el_prev.get('tag')} (LPIPS: {lp_score:.3f}, CLIP: {clip_score:.3f})")
+                    changed_elements.append((len(results) - 1, el_prev, el_curr, bbox, curr_bbox, lp_score, clip_score))
+                    print(f"  🔴 Change detected by {tier}: {el_prev.get('tag')} "
+                          f"(LPIPS: {self._format_score(lp_score)}, CLIP: {self._format_score(clip_score)})")
 
             except Exception as e:
                 print(f"  ⚠️ Skipped {el_prev.get('tag')} - {str(e)}")
                 continue
 
         print(f"\n📊 First pass complete: {len(results)} elements compared, {len(changed_elements)} potential changes")
+        print(f"  - Unique crop pairs scored: {len(verdicts)}")
         print(f"  - Elements with children: {elements_with_children}")
         print(f"  - Total elements processed: {total_elements}")
 
@@ -160,11 +242,12 @@ class VisualComparator:
             prev_dom_map = self._create_dom_map(prev_dom)
             curr_dom_map = self._create_dom_map(curr_dom)
 
-            for idx, (el_prev, el_curr, bbox, old_lp, old_clip) in enumerate(changed_elements, 1):
+            for idx, (result_idx, el_prev, el_curr, bbox, curr_bbox, old_lp, old_clip) in enumerate(changed_elements, 1):
                 print(f"\n  🔄 Processing change {idx}/{len(changed_elements)}: {el_prev.get('tag')}")
                 try:
                     x, y = bbox[0], bbox[1]
-                    crop_prev, crop_curr = prev_img.crop(bbox).copy(), curr_img.crop(bbox).copy()
+                    cx, cy = curr_bbox[0], curr_bbox[1]
+                    crop_prev, crop_curr = prev_img.crop(bbox).copy(), curr_img.crop(curr_bbox).copy()
 
                     prev_has_children = bool(el_prev.get("children"))
                     curr_has_children = bool(el_curr.get("children"))
@@ -177,27 +260,28 @@ class VisualComparator:
                         masking_applied += 1
                     if curr_has_children:
                         print(f"    🎭 Masking current element children")
-                        mask_children(crop_curr, el_curr, curr_dom_map, x, y)
+                        mask_children(crop_curr, el_curr, curr_dom_map, cx, cy)
                         masking_applied += 1
 
-                    new_lp = self.lpips_model.compute_distance(crop_prev, crop_curr)
-                    new_clip = self.clip_model.compute_similarity(crop_prev, crop_curr)
-                    is_changed = (new_lp > self.lpips_thresh) or (new_clip < self.clip_thresh)
-
-                    print(f"    - Scores: LPIPS={new_lp:.3f} (was {old_lp:.3f}), CLIP={new_clip:.3f} (was {old_clip:.3f})")
-                    print(f"    - Change status: {'Changed' if is_changed else 'Unchanged'}")
-
-                    # Update results with new scores
-                    for result in results:
-                        if result["bbox"] == bbox:
-                            result.update({
-                                "LPIPS": round(new_lp, 4),
-                                "CLIP": round(new_clip, 4),
-                                "LPIPS_Detects_Change": int(new_lp > self.lpips_thresh),
-                                "CLIP_Detects_Change": int(new_clip < self.clip_thresh),
-                                "Change_Flag": int(is_changed)
-                            })
-                            break
+                    # Only first-pass reuse across different elements counts as deduplication
+                    is_changed, scores, tier = self._evaluate_crops(crop_prev, crop_curr, verdicts, count_hit=False)
+                    new_lp, new_clip = scores.get("LPIPS"), scores.get("CLIP")
+
+                    print(f"    - Scores: LPIPS={self._format_score(new_lp)} (was {self._format_score(old_lp)}), "
+                          f"CLIP={self._format_score(new_clip)} (was {self._format_score(old_clip)})")
+                    print(f"    - Change status: {'Changed' if is_changed else 'Unchanged'} (decided by {tier})")
+
+                    # Update the verified element's own record (wrappers often share a child's bbox)
+                    result = results[result_idx]
+                    result.update(self._score_fields(new_lp, new_clip))
+                    result.update({
+                        "Change_Flag": int(is_changed),
+                        "Tier": tier
+                    })
+                    if raw_rows is not None:
+                        raw = raw_rows[result_idx]
+                        raw["lpips"][1], raw["clip"][1] = new_lp, new_clip
+                        raw["tier"][1], raw["changed"][1] = tier, is_changed
 
                 except Exception as e:
                     print(f"    ⚠️ Failed to process changed element: {e}")
@@ -208,20 +292,29 @@ class VisualComparator:
 
         return results, changed_elements
 
-    def _highlight_changes(self, draw: ImageDraw.Draw, df_scores: pd.DataFrame) -> None:
+    def _highlight_changes(self, draw: ImageDraw.Draw, scores: ResultTable, bbox_column: str = "bbox") -> None:
         """Draw red rectangles around changed elements."""
         print("\n🖍️ Highlighting changes in image")
-        changes = df_scores[df_scores["Change_Flag"] == 1]
+        changes = scores.changed()
         print(f"  - Found {len(changes)} elements to highlight")
         
-        for _, row in changes.iterrows():
+        for row in changes:
             try:
-                x1, y1, x2, y2 = row["bbox"]
+                x1, y1, x2, y2 = row[bbox_column]
                 draw.rectangle([x1, y1, x2, y2], outline="red", width=3)
                 print(f"    ✅ Highlighted {row['tag']} at ({x1},{y1})-({x2},{y2})")
             except (KeyError, ValueError) as e:
                 print(f"    ⚠️ Failed to highlight change: {e}")
 
+    def _run_comparison(self, prev_img: Image.Image, curr_img: Image.Image, prev_dom: List[Dict], curr_dom: List[Dict],
+                        shift_map: Optional[ShiftMap]) -> Tuple[List[Dict], List[Dict], Dict[str, int]]:
+        """Score all element pairs; returns (result records, raw score rows, per-tier hit counts)."""
+        self.cascade.reset_counts()
+        self.dedup_hits = 0
+        raw_rows = []
+        results, _ = self._compare_elements(prev_img, curr_img, prev_dom, curr_dom, shift_map, raw_rows)
+        return results, raw_rows, dict(self.cascade.hits)
+
     def compare(self, prev_pair: Dict, curr_pair: Dict) -> Dict:
         """Main comparison method."""
         print("\n" + "="*50)
@@ -232,30 +325,40 @@ class VisualComparator:
             prev_dom, curr_dom = prev_pair.get("dom", []), curr_pair.get("dom", [])
 
             print(f"\n📝 DOM elements: Previous={len(prev_dom)}, Current={len(curr_dom)}")
-            results, _ = self._compare_elements(prev_img, curr_img, prev_dom, curr_dom)
-            df_scores = pd.DataFrame(results)
+            shift_map = None
+            if self.shift_estimator is not None:
+                shift_map = self.shift_estimator.estimate(prev_img, curr_img, prev_dom, curr_dom)
+            layout_shifts = LayoutShiftEstimator.findings(shift_map) if shift_map else []
+
+            results, raw_rows, tier_hits = self._run_comparison(prev_img, curr_img, prev_dom, curr_dom, shift_map)
+            scores = ResultTable(results)
 
-            self._highlight_changes(prev_draw, df_scores)
-            self._highlight_changes(curr_draw, df_scores)
+            self._highlight_changes(prev_draw, scores)
+            self._highlight_changes(curr_draw, scores, "curr_bbox")
 
-            changed_count = df_scores["Change_Flag"].sum()
-            total_count = len(df_scores)
-            change_percent = (changed_count / total_count * 100) if total_count > 0 else 0.0
+            summary = scores.summary()
+            changed_count, total_count = summary["changed_regions"], summary["total_regions"]
+            change_percent = summary["change_percent"]
 
             print("\n" + "="*50)
             print("🏁 Comparison complete")
             print(f"  - Total regions: {total_count}")
             print(f"  - Changed regions: {changed_count} ({change_percent:.1f}%)")
+            print(f"  - Layout shifts: {len(layout_shifts)}")
+            print(f"  - Duplicate crop pairs reused: {self.dedup_hits}")
+            print(f"  - Tier decisions: {', '.join(f'{name}={count}' for name, count in tier_hits.items())}")
             print("="*50)
 
             return {
                 "highlighted_prev": prev_img,
                 "highlighted_curr": curr_img,
-                "scores": df_scores,
+                "scores": scores,
+                "raw_scores": build_score_columns(raw_rows, self.lpips_thresh, self.clip_thresh, self.min_size),
                 "summary": {
-                    "total_regions": total_count,
-                    "changed_regions": changed_count,
-                    "change_percent": round(change_percent, 2)
+                    **summary,
+                    "tier_hits": tier_hits,
+                    "dedup_hits": self.dedup_hits,
+                    "layout_shifts": layout_shifts
                 }
             }
         except Exception as e:
@@ -0,0 +1,542 @@
+"""
+CPU inference backends for the LPIPS / CLIP wrappers.
+
+The wrappers keep their torch network on a `.model` attribute and call it with
+tensors; `apply_backend` swaps that module (or, for CLIP, only its image encoder)
+for a quantized, TorchScript or ONNX Runtime version without touching
+`compute_distance` / `compute_similarity`. `measure_drift` checks a candidate
+backend against the reference on a stored corpus of crop pairs.
+
+    # 1. build a drift corpus from captured baselines (visual_tests/baseline)
+    python inference_backends.py build-corpus --out drift_corpus
+    # 2. compare a backend against the eager fp32 reference
+    python inference_backends.py check drift_corpus --kind onnx --quantize --threads 4
+
+The runner and the parallel compare workers build their models with `load_lpips` /
+`load_clip`, which apply the backend described by the environment:
+
+    VT_BACKEND=onnx VT_BACKEND_QUANTIZE=1 VT_BACKEND_THREADS=4 \
+    VT_BACKEND_CORPUS=drift_corpus python visual_test_runner.py
+
+Exported artifacts are cached in VT_BACKEND_EXPORT_DIR (default: exported_models/) and
+reused on later runs; set VT_BACKEND_REBUILD=1 after changing model weights.
+"""
+import os
+import inspect
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+from PIL import Image
+
+BACKEND_KINDS = ("eager", "torchscript", "onnx")
+DEFAULT_BASELINE_DIR = Path(__file__).resolve().parent / "baseline"
+DEFAULT_EXPORT_DIR = Path(__file__).resolve().parent / "exported_models"
+
+# Input geometry / normalization used for tracing, export and calibration
+LPIPS_INPUT = (64, 64)
+LPIPS_NORM = ((0.5, 0.5, 0.5), (0.5, 0.5, 0.5))
+CLIP_INPUT = 224
+CLIP_NORM = ((0.4815, 0.4578, 0.4082), (0.2686, 0.2613, 0.2758))
+
+
+@dataclass
+class BackendConfig:
+    kind: str = "eager"
+    quantize: bool = False
+    num_threads: Optional[int] = None
+    export_dir: Optional[str] = None
+    # Drift corpus whose crops calibrate static int8 quantization and serve as export examples
+    corpus_dir: Optional[str] = None
+    # Re-export even when a cached artifact exists
+    rebuild: bool = False
+
+    @property
+    def is_reference(self) -> bool:
+        return self.kind == "eager" and not self.quantize
+
+
+def config_from_env(environ: Optional[Dict[str, str]] = None) -> BackendConfig:
+    """BackendConfig from VT_BACKEND* environment variables (eager fp32 when unset)."""
+    env = os.environ if environ is None else environ
+    flag = lambda key: env.get(key, "").strip().lower() in ("1", "true", "yes", "on")
+    threads = env.get("VT_BACKEND_THREADS", "").strip()
+    config = BackendConfig(
+        kind=env.get("VT_BACKEND", "eager").strip().lower() or "eager",
+        quantize=flag("VT_BACKEND_QUANTIZE"),
+        num_threads=int(threads) if threads else None,
+        export_dir=env.get("VT_BACKEND_EXPORT_DIR") or None,
+        corpus_dir=env.get("VT_BACKEND_CORPUS") or None,
+        rebuild=flag("VT_BACKEND_REBUILD")
+    )
+    if config.kind not in BACKEND_KINDS:
+        raise ValueError(f"Unknown VT_BACKEND '{config.kind}', expected one of {BACKEND_KINDS}")
+    return config
+
+
+def set_num_threads(num_threads: int) -> None:
+    """Pin torch (and therefore the wrappers) to a fixed number of CPU threads."""
+    import torch
+
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(num_threads)
+    except RuntimeError:
+        # Inter-op pool can only be sized once per process
+        print(f"[!] Inter-op thread count already fixed, keeping intra-op={num_threads}")
+
+
+def _layer_mix(module) -> Tuple[bool, bool]:
+    """(conv-dominated, has Linear layers) by parameter count."""
+    import torch
+
+    conv_params = sum(p.numel() for m in module.modules() if isinstance(m, torch.nn.Conv2d) for p in m.parameters())
+    linear_params = sum(p.numel() for m in module.modules() if isinstance(m, torch.nn.Linear) for p in m.parameters())
+    return conv_params > 0 and conv_params >= linear_params, linear_params > 0
+
+
+def quantize_module(module, example_inputs: Tuple, calibration: Optional[Sequence[Tuple]] = None):
+    """
+    int8 quantization suited to the module's layers (eager / TorchScript backends).
+
+    Conv-dominated nets (LPIPS's AlexNet/VGG trunk and 1x1 heads, ResNet CLIP encoders) get
+    FX static post-training quantization calibrated on `calibration` batches; dynamic
+    quantization does not cover Conv2d. Linear-dominated nets (ViT CLIP encoders, whose only
+    conv is the patch embedding) get dynamic Linear quantization.
+    """
+    import torch
+
+    conv_dominated, has_linear = _layer_mix(module)
+    if conv_dominated:
+        if not calibration:
+            raise ValueError("Static int8 quantization of conv layers needs calibration batches")
+        from torch.ao.quantization import get_default_qconfig_mapping
+        from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+        prepared = prepare_fx(module, get_default_qconfig_mapping("x86"), example_inputs)
+        with torch.inference_mode():
+            for batch in calibration:
+                prepared(*batch)
+        print(f"[✓] Static int8 quantization calibrated on {len(calibration)} batches")
+        return convert_fx(prepared)
+
+    if has_linear:
+        print("[✓] Dynamic int8 quantization of Linear layers")
+        return torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+
+    raise ValueError(f"{type(module).__name__} has no Conv2d or Linear layers to quantize")
+
+
+def load_torchscript(path: str):
+    """Load a saved frozen TorchScript module and apply inference-only graph optimizations."""
+    import torch
+
+    # optimize_for_inference output is not serializable, so it is applied after loading
+    return torch.jit.optimize_for_inference(torch.jit.load(path))
+
+
+def export_torchscript(module, example_inputs: Tuple, path: str):
+    """Trace, freeze, save and reload a module as TorchScript."""
+    import torch
+
+    with torch.inference_mode():
+        traced = torch.jit.trace(module, example_inputs, check_trace=False)
+    torch.jit.save(torch.jit.freeze(traced), path)
+    print(f"[✓] TorchScript module saved to {path}")
+    return load_torchscript(path)
+
+
+class OnnxModule:
+    """Callable stand-in for a torch module, backed by an ONNX Runtime CPU session."""
+
+    def __init__(self, path: str, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def eval(self):
+        return self
+
+    def __call__(self, *inputs):
+        import torch
+
+        feeds = {name: t.detach().cpu().numpy() for name, t in zip(self.input_names, inputs)}
+        outputs = self.session.run(None, feeds)
+        return torch.from_numpy(outputs[0])
+
+
+def export_onnx(module, example_inputs: Tuple, path: str, num_threads: Optional[int] = None) -> OnnxModule:
+    """Export a module to ONNX (dynamic batch/spatial dims) and open it with ONNX Runtime."""
+    import torch
+
+    input_names = [f"input_{i}" for i in range(len(example_inputs))]
+    dynamic_axes = {name: {0: "batch", 2: "height", 3: "width"} for name in input_names}
+    # torch >= 2.9 defaults to the torch.export-based exporter (needs onnxscript, no dynamic_axes);
+    # keep the TorchScript-based one this function is written for
+    legacy = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+    with torch.inference_mode():
+        torch.onnx.export(module, example_inputs, path, input_names=input_names,
+                          output_names=["output"], dynamic_axes=dynamic_axes, opset_version=17, **legacy)
+    print(f"[✓] ONNX model saved to {path}")
+    return OnnxModule(path, num_threads)
+
+
+class _CalibrationReader:
+    """onnxruntime.quantization CalibrationDataReader over torch calibration batches."""
+
+    def __init__(self, input_names: List[str], batches: Sequence[Tuple]):
+        self._feeds = iter([{name: t.detach().cpu().numpy() for name, t in zip(input_names, batch)}
+                            for batch in batches])
+
+    def get_next(self):
+        return next(self._feeds, None)
+
+
+def quantize_onnx(module, fp32_path: str, int8_path: str, calibration: Optional[Sequence[Tuple]] = None) -> None:
+    """
+    int8 quantization of an exported fp32 ONNX model with ONNX Runtime's quantizer.
+
+    torch.onnx cannot export torch's quantized ops, so ONNX models are quantized after
+    export: static QDQ (calibrated) for conv-dominated nets, dynamic for Linear-dominated ones.
+    """
+    from onnxruntime.quantization import QuantType, quantize_dynamic, quantize_static
+
+    conv_dominated, has_linear = _layer_mix(module)
+    if conv_dominated:
+        if not calibration:
+            raise ValueError("Static int8 quantization of conv layers needs calibration batches")
+        input_names = [f"input_{i}" for i in range(len(calibration[0]))]
+        quantize_static(fp32_path, int8_path, _CalibrationReader(input_names, calibration),
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+        print(f"[✓] ONNX static int8 quantization calibrated on {len(calibration)} batches")
+    elif has_linear:
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        print("[✓] ONNX dynamic int8 quantization of MatMul/Gemm layers")
+    else:
+        raise ValueError(f"{type(module).__name__} has no Conv2d or Linear layers to quantize")
+
+
+def image_encoder(model):
+    """
+    The image tower of a CLIP model as a standalone module taking only pixel tensors.
+
+    CLIP's own forward needs image *and* text, so it cannot be traced or exported as-is.
+    Supports OpenAI CLIP (`encode_image`) and Hugging Face CLIPModel (`get_image_features`).
+    """
+    import torch
+
+    if not hasattr(model, "encode_image") and not hasattr(model, "get_image_features"):
+        raise ValueError(f"{type(model).__name__} has no encode_image / get_image_features")
+
+    class ImageEncoder(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.clip = model  # registers the weights so quantization / export see them
+
+        def forward(self, pixels):
+            # Go through self.clip, not the original model: quantization works on a copy
+            if hasattr(self.clip, "encode_image"):
+                return self.clip.encode_image(pixels)
+            return self.clip.get_image_features(pixel_values=pixels)
+
+    return ImageEncoder().eval()
+
+
+class ImageEncoderOverride:
+    """CLIP model proxy whose image path runs on a backend; text and everything else stay eager."""
+
+    def __init__(self, model, encoder):
+        self._model = model
+        self._encoder = encoder
+
+    def encode_image(self, pixels):
+        return self._encoder(pixels)
+
+    def get_image_features(self, pixel_values=None, **kwargs):
+        return self._encoder(pixel_values)
+
+    def __getattr__(self, name):
+        # object.__getattribute__ raises AttributeError (not recursion) on half-built copies
+        return getattr(object.__getattribute__(self, "_model"), name)
+
+
+def prepare_module(module, config: BackendConfig, example_inputs: Tuple, name: str = "model",
+                   calibration: Optional[Sequence[Tuple]] = None):
+    """
+    Build the inference module described by `config` from an eager torch module.
+
+    TorchScript / ONNX artifacts already present in the export dir are loaded instead of
+    being rebuilt, unless config.rebuild is set.
+    """
+    if config.kind not in BACKEND_KINDS:
+        raise ValueError(f"Unknown backend '{config.kind}', expected one of {BACKEND_KINDS}")
+    if config.num_threads:
+        set_num_threads(config.num_threads)
+
+    module = module.eval()
+    if config.kind == "eager":
+        return quantize_module(module, example_inputs, calibration) if config.quantize else module
+
+    export_dir = Path(config.export_dir or DEFAULT_EXPORT_DIR)
+    export_dir.mkdir(parents=True, exist_ok=True)
+    suffix = "_int8" if config.quantize else ""
+
+    if config.kind == "torchscript":
+        path = export_dir / f"{name}{suffix}.pt"
+        if path.exists() and not config.rebuild:
+            print(f"[✓] Reusing TorchScript module {path}")
+            return load_torchscript(str(path))
+        if config.quantize:
+            module = quantize_module(module, example_inputs, calibration)
+        return export_torchscript(module, example_inputs, str(path))
+
+    path = export_dir / f"{name}{suffix}.onnx"
+    if path.exists() and not config.rebuild:
+        print(f"[✓] Reusing ONNX model {path}")
+        return OnnxModule(str(path), config.num_threads)
+    fp32_path = export_dir / f"{name}.onnx"
+    fp32 = export_onnx(module, example_inputs, str(fp32_path), config.num_threads)
+    if not config.quantize:
+        return fp32
+    quantize_onnx(module, str(fp32_path), str(path), calibration)
+    return OnnxModule(str(path), config.num_threads)
+
+
+def apply_backend(wrapper, config: BackendConfig, example_inputs: Tuple, name: str = "model",
+                  calibration: Optional[Sequence[Tuple]] = None, image_encoder_only: bool = False):
+    """
+    Swap `wrapper.model` for the configured backend in place and return the wrapper.
+
+    With image_encoder_only=True (CLIP) only the image tower is rebuilt; `example_inputs`
+    and `calibration` are then pixel-only batches.
+    """
+    if not hasattr(wrapper, "model"):
+        raise ValueError(f"{type(wrapper).__name__} does not expose a `.model` to replace")
+    if image_encoder_only:
+        encoder = prepare_module(image_encoder(wrapper.model), config, example_inputs, name, calibration)
+        wrapper.model = ImageEncoderOverride(wrapper.model, encoder)
+    else:
+        wrapper.model = prepare_module(wrapper.model, config, example_inputs, name, calibration)
+    print(f"[✓] {type(wrapper).__name__} running on {config.kind} backend "
+          f"(quantize={config.quantize}, threads={config.num_threads or 'default'})")
+    return wrapper
+
+
+def _backend_batches(config: BackendConfig, size: Tuple[int, int], norm: Tuple, pairs: bool) -> List[Tuple]:
+    """Export examples / calibration batches: corpus crops when configured, else one random batch."""
+    if config.corpus_dir:
+        corpus = load_crop_corpus(config.corpus_dir)
+        if corpus:
+            return _crop_batches(corpus, size, *norm, pairs=pairs)
+    import torch
+
+    example = torch.rand(1, 3, *size) * 2 - 1
+    return [(example, example.clone()) if pairs else (example,)]
+
+
+def load_lpips(config: Optional[BackendConfig] = None):
+    """LPIPSWrapper on the configured backend (environment config by default)."""
+    from model_wrappers import LPIPSWrapper
+
+    config = config or config_from_env()
+    wrapper = LPIPSWrapper()
+    if config.is_reference:
+        if config.num_threads:
+            set_num_threads(config.num_threads)
+        return wrapper
+    # Random batches only serve as trace examples; static quantization needs the corpus
+    batches = _backend_batches(config, LPIPS_INPUT, LPIPS_NORM, pairs=True)
+    return apply_backend(wrapper, config, batches[0], "lpips", batches if config.corpus_dir else None)
+
+
+def load_clip(config: Optional[BackendConfig] = None):
+    """CLIPWrapper whose image encoder runs on the configured backend."""
+    from model_wrappers import CLIPWrapper
+
+    config = config or config_from_env()
+    wrapper = CLIPWrapper()
+    if config.is_reference:
+        if config.num_threads:
+            set_num_threads(config.num_threads)
+        return wrapper
+    batches = _backend_batches(config, (CLIP_INPUT, CLIP_INPUT), CLIP_NORM, pairs=False)
+    return apply_backend(wrapper, config, batches[0], "clip_image", batches if config.corpus_dir else None,
+                         image_encoder_only=True)
+
+
+# ------------------------------
+# Accuracy check against the reference backend
+
+def load_crop_corpus(corpus_dir: str) -> List[Tuple[str, Image.Image, Image.Image]]:
+    """Loads `<name>_prev.png` / `<name>_curr.png` pairs from a corpus directory."""
+    corpus = []
+    for prev_path in sorted(Path(corpus_dir).glob("*_prev.png")):
+        name = prev_path.name[:-len("_prev.png")]
+        curr_path = prev_path.with_name(f"{name}_curr.png")
+        if not curr_path.exists():
+            print(f"[!] Missing current crop for {name}, skipping")
+            continue
+        corpus.append((name, Image.open(prev_path).convert("RGB"), Image.open(curr_path).convert("RGB")))
+    print(f"[✓] Loaded {len(corpus)} crop pairs from {corpus_dir}")
+    return corpus
+
+
+def save_crop_pair(corpus_dir: str, name: str, crop_prev: Image.Image, crop_curr: Image.Image) -> None:
+    """Adds one crop pair (e.g. a compare segment) to the drift corpus."""
+    os.makedirs(corpus_dir, exist_ok=True)
+    crop_prev.save(os.path.join(corpus_dir, f"{name}_prev.png"))
+    crop_curr.save(os.path.join(corpus_dir, f"{name}_curr.png"))
+
+
+def _score_corpus(lpips_model, clip_model, corpus: Sequence) -> Tuple[List[Tuple[float, float]], float]:
+    scores = []
+    start = time.perf_counter()
+    for _, crop_prev, crop_curr in corpus:
+        scores.append((lpips_model.compute_distance(crop_prev, crop_curr),
+                       clip_model.compute_similarity(crop_prev, crop_curr)))
+    elapsed = time.perf_counter() - start
+    return scores, (elapsed / len(corpus) * 1000) if corpus else 0.0
+
+
+def measure_drift(reference: Tuple, candidate: Tuple, corpus: Sequence,
+                  lpips_thresh: float = 0.03, clip_thresh: float = 0.98) -> Dict:
+    """
+    Scores the corpus with both (lpips, clip) wrapper pairs and reports score drift,
+    per-crop latency and any crop whose change flag differs between backends.
+    """
+    ref_scores, ref_ms = _score_corpus(*reference, corpus)
+    cand_scores, cand_ms = _score_corpus(*candidate, corpus)
+
+    lpips_drift, clip_drift, flipped = [], [], []
+    for (name, _, _), (ref_lp, ref_clip), (cand_lp, cand_clip) in zip(corpus, ref_scores, cand_scores):
+        lpips_drift.append(abs(ref_lp - cand_lp))
+        clip_drift.append(abs(ref_clip - cand_clip))
+        ref_flag = (ref_lp > lpips_thresh) or (ref_clip < clip_thresh)
+        cand_flag = (cand_lp > lpips_thresh) or (cand_clip < clip_thresh)
+        if ref_flag != cand_flag:
+            flipped.append(name)
+
+    count = len(corpus)
+    report = {
+        "crops": count,
+        "lpips_max_drift": round(max(lpips_drift, default=0.0), 6),
+        "lpips_mean_drift": round(sum(lpips_drift) / count, 6) if count else 0.0,
+        "clip_max_drift": round(max(clip_drift, default=0.0), 6),
+        "clip_mean_drift": round(sum(clip_drift) / count, 6) if count else 0.0,
+        "flag_flips": flipped,
+        "reference_ms_per_crop": round(ref_ms, 2),
+        "candidate_ms_per_crop": round(cand_ms, 2),
+        "speedup": round(ref_ms / cand_ms, 2) if cand_ms else None
+    }
+    status = "✓" if not flipped else "✗"
+    print(f"[{status}] Drift over {count} crops: LPIPS max={report['lpips_max_drift']}, "
+          f"CLIP max={report['clip_max_drift']}, flips={len(flipped)}, "
+          f"latency {report['reference_ms_per_crop']}ms -> {report['candidate_ms_per_crop']}ms")
+    return report
+
+
+def build_corpus_from_baseline(corpus_dir: str, baseline_dir: Path = DEFAULT_BASELINE_DIR,
+                               page_name: str = "test_home_page", per_pair: int = 25, min_size: int = 20) -> int:
+    """
+    Fills a drift corpus with element crop pairs from consecutive captured commits.
+
+    Uses the commit order in baseline/commit_cache.json and the same prev-bbox cropping as
+    VisualComparator; crop pairs that differ are preferred so flag flips are exercised.
+    """
+    baseline_dir = Path(baseline_dir)
+    cache_file = baseline_dir / "commit_cache.json"
+    history = json.load(open(cache_file)).get("history", []) if cache_file.exists() else []
+    saved = 0
+
+    for prev, curr in zip(history, history[1:]):
+        paths = [baseline_dir / c / f"{page_name}{suffix}" for c in (prev, curr) for suffix in (".png", "_dom.json")]
+        if not all(p.exists() for p in paths):
+            continue
+        prev_img, curr_img = Image.open(paths[0]).convert("RGB"), Image.open(paths[2]).convert("RGB")
+        prev_dom, curr_dom = json.load(open(paths[1])), json.load(open(paths[3]))
+
+        differing, identical = [], []
+        for el_prev, el_curr in zip(prev_dom, curr_dom):
+            if el_prev.get("tag") != el_curr.get("tag"):
+                continue
+            x, y, w, h = (int(el_prev.get(k, 0)) for k in ("x", "y", "width", "height"))
+            if w < min_size or h < min_size:
+                continue
+            if x < 0 or y < 0 or x + w > min(prev_img.width, curr_img.width) or y + h > min(prev_img.height, curr_img.height):
+                continue
+            bbox = (x, y, x + w, y + h)
+            crop_prev, crop_curr = prev_img.crop(bbox), curr_img.crop(bbox)
+            (identical if crop_prev.tobytes() == crop_curr.tobytes() else differing).append((crop_prev, crop_curr))
+
+        for i, (crop_prev, crop_curr) in enumerate((differing + identical)[:per_pair]):
+            save_crop_pair(corpus_dir, f"{prev[:8]}_{curr[:8]}_{i:03d}", crop_prev, crop_curr)
+            saved += 1
+
+    print(f"[✓] Saved {saved} crop pairs to {corpus_dir}")
+    return saved
+
+
+def _crop_batches(corpus: Sequence, size: Tuple[int, int], mean: Tuple, std: Tuple, pairs: bool):
+    """Corpus crops as resized, normalized 1x3xHxW tensors for export examples and calibration."""
+    import numpy as np
+    import torch
+
+    def to_tensor(img):
+        arr = np.asarray(img.resize((size[1], size[0])), dtype=np.float32) / 255.0
+        arr = (arr - np.array(mean, dtype=np.float32)) / np.array(std, dtype=np.float32)
+        return torch.from_numpy(arr.transpose(2, 0, 1)).unsqueeze(0)
+
+    if pairs:
+        return [(to_tensor(prev), to_tensor(curr)) for _, prev, curr in corpus]
+    return [(to_tensor(img),) for _, prev, curr in corpus for img in (prev, curr)]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="CPU inference backends for the LPIPS / CLIP wrappers.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build-corpus", help="Create a drift corpus from captured baselines")
+    build.add_argument("--baseline", default=str(DEFAULT_BASELINE_DIR))
+    build.add_argument("--out", default="drift_corpus")
+    build.add_argument("--page", default="test_home_page")
+    build.add_argument("--per-pair", type=int, default=25)
+
+    check = commands.add_parser("check", help="Check a backend against the eager reference models")
+    check.add_argument("corpus_dir")
+    check.add_argument("--kind", choices=BACKEND_KINDS, default="eager")
+    check.add_argument("--quantize", action="store_true")
+    check.add_argument("--threads", type=int, default=None)
+    check.add_argument("--lpips-input", type=int, nargs=2, default=LPIPS_INPUT, metavar=("H", "W"),
+                       help="Spatial size used for tracing / export / calibration")
+    check.add_argument("--clip-input", type=int, default=CLIP_INPUT)
+    check.add_argument("--export-dir", default=None)
+    args = parser.parse_args()
+
+    if args.command == "build-corpus":
+        build_corpus_from_baseline(args.out, Path(args.baseline), args.page, args.per_pair)
+    else:
+        from model_wrappers import LPIPSWrapper, CLIPWrapper
+
+        corpus = load_crop_corpus(args.corpus_dir)
+        if not corpus:
+            raise SystemExit("[✗] Empty corpus, run `python inference_backends.py build-corpus` first")
+        # The check always re-exports so it measures the current weights, not a cached artifact
+        config = BackendConfig(kind=args.kind, quantize=args.quantize, num_threads=args.threads,
+                               export_dir=args.export_dir, rebuild=True)
+        lpips_batches = _crop_batches(corpus, tuple(args.lpips_input), *LPIPS_NORM, pairs=True)
+        clip_batches = _crop_batches(corpus, (args.clip_input, args.clip_input), *CLIP_NORM, pairs=False)
+
+        reference = (LPIPSWrapper(), CLIPWrapper())
+        candidate = (apply_backend(LPIPSWrapper(), config, lpips_batches[0], "lpips", lpips_batches),
+                     apply_backend(CLIPWrapper(), config, clip_batches[0], "clip_image", clip_batches,
+                                   image_encoder_only=True))
+        print(json.dumps(measure_drift(reference, candidate, corpus), indent=2))
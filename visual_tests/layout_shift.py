@@ -0,0 +1,240 @@
+import hashlib
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+
+@dataclass
+class ShiftRegion:
+    """A band of previous-screenshot rows that moved by (dx, dy) in the current screenshot."""
+    start_row: int
+    end_row: int
+    dx: int
+    dy: int
+    elements: int = 0
+
+
+@dataclass
+class ShiftMap:
+    regions: List[ShiftRegion] = field(default_factory=list)
+    row_offsets: Dict[int, int] = field(default_factory=dict)
+
+    def region_for(self, y: int) -> Optional[ShiftRegion]:
+        for region in self.regions:
+            if region.start_row <= y < region.end_row:
+                return region
+        return None
+
+    def shifted_bbox(self, el_prev: Dict, el_curr: Dict, bbox: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+        """Where the previous element's pixels should be looked for in the current screenshot."""
+        x1, y1, x2, y2 = bbox
+        region = self.region_for(y1)
+        if region is None:
+            return bbox
+        # Prefer the element's own DOM delta when its row band agrees it moved
+        try:
+            dx = int(el_curr.get("x", 0)) - int(el_prev.get("x", 0))
+            dy = int(el_curr.get("y", 0)) - int(el_prev.get("y", 0))
+        except (TypeError, ValueError):
+            dx, dy = region.dx, region.dy
+        if (dx, dy) == (0, 0):
+            return bbox
+        if dy != region.dy:
+            dx, dy = region.dx, region.dy
+        return (x1 + dx, y1 + dy, x2 + dx, y2 + dy)
+
+    @property
+    def moved_regions(self) -> List[ShiftRegion]:
+        return [r for r in self.regions if r.dx or r.dy]
+
+
+class LayoutShiftEstimator:
+    """
+    Aligns screenshot rows by hash and combines the alignment with DOM rect deltas.
+
+    Alignment is patience-style: rows whose hash is unique in both screenshots anchor the
+    match, the longest monotone chain of anchors is kept, and each anchor's offset is
+    extended over neighbouring rows that still match. Cost stays near-linear even when most
+    rows are identical page background.
+
+    Rows that do not align at any vertical offset (e.g. content that only moved sideways,
+    so every row's pixels changed) fall back to DOM rect deltas: runs of elements that
+    moved by the same (dx, dy) form a region of their own.
+    """
+
+    def __init__(self, min_run: int = 8, max_shift: int = 2000, min_dom_elements: int = 2):
+        # Matching row runs shorter than this are treated as coincidental (e.g. blank rows)
+        self.min_run = min_run
+        # Offsets larger than this are never considered
+        self.max_shift = max_shift
+        # A DOM-only region needs at least this many elements agreeing on the same delta
+        self.min_dom_elements = min_dom_elements
+
+    @staticmethod
+    def _row_hashes(rows: np.ndarray) -> List[bytes]:
+        return [hashlib.blake2b(row.tobytes(), digest_size=8).digest() for row in rows]
+
+    @staticmethod
+    def _anchor_chain(anchors: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Longest chain of (prev_row, curr_row) anchors increasing in both rows (O(n log n))."""
+        tails, tail_idx, parent = [], [], [-1] * len(anchors)
+        for i, (_, curr_row) in enumerate(anchors):
+            pos = bisect_left(tails, curr_row)
+            if pos == len(tails):
+                tails.append(curr_row)
+                tail_idx.append(i)
+            else:
+                tails[pos] = curr_row
+                tail_idx[pos] = i
+            parent[i] = tail_idx[pos - 1] if pos else -1
+        chain, i = [], tail_idx[-1] if tail_idx else -1
+        while i >= 0:
+            chain.append(anchors[i])
+            i = parent[i]
+        return chain[::-1]
+
+    def _row_offsets(self, prev_img: Image.Image, curr_img: Image.Image) -> Optional[Dict[int, int]]:
+        """Vertical offset per aligned previous row; None when the screenshots are pixel-identical."""
+        prev_arr, curr_arr = np.asarray(prev_img.convert("RGB")), np.asarray(curr_img.convert("RGB"))
+        # Unchanged pages (the common case) skip row hashing entirely
+        if np.array_equal(prev_arr, curr_arr):
+            return None
+        prev_rows, curr_rows = self._row_hashes(prev_arr), self._row_hashes(curr_arr)
+        if prev_rows == curr_rows:
+            return None
+
+        prev_counts, curr_counts = Counter(prev_rows), Counter(curr_rows)
+        curr_index = {h: i for i, h in enumerate(curr_rows) if curr_counts[h] == 1}
+        anchors = [(i, curr_index[h]) for i, h in enumerate(prev_rows)
+                   if prev_counts[h] == 1 and h in curr_index and abs(curr_index[h] - i) <= self.max_shift]
+
+        # Grow each anchor's offset over adjacent rows that still match; every row is assigned once
+        offsets = {}
+        for prev_row, curr_row in self._anchor_chain(anchors):
+            if prev_row in offsets:
+                continue
+            dy = curr_row - prev_row
+            for step in (-1, 1):
+                row = prev_row if step == 1 else prev_row - 1
+                while (0 <= row < len(prev_rows) and 0 <= row + dy < len(curr_rows)
+                       and row not in offsets and prev_rows[row] == curr_rows[row + dy]):
+                    offsets[row] = dy
+                    row += step
+
+        # Drop short runs, they are as likely coincidence as alignment
+        kept, run = {}, []
+        for row in sorted(offsets) + [None]:
+            if run and (row is None or row != run[-1] + 1 or offsets[row] != offsets[run[-1]]):
+                if len(run) >= self.min_run:
+                    kept.update((r, offsets[r]) for r in run)
+                run = []
+            if row is not None:
+                run.append(row)
+        return kept
+
+    @staticmethod
+    def _dom_dx(prev_dom: List[Dict], curr_dom: List[Dict], start: int, end: int, dy: int) -> Tuple[int, int]:
+        """Median horizontal DOM delta of elements in a row band that moved vertically by dy."""
+        deltas = []
+        for el_prev, el_curr in zip(prev_dom, curr_dom):
+            if el_prev.get("tag") != el_curr.get("tag"):
+                continue
+            try:
+                y = int(el_prev.get("y", 0))
+                if start <= y < end and int(el_curr.get("y", 0)) - y == dy:
+                    deltas.append(int(el_curr.get("x", 0)) - int(el_prev.get("x", 0)))
+            except (TypeError, ValueError):
+                continue
+        return (int(median(deltas)) if deltas else 0), len(deltas)
+
+    def _dom_regions(self, prev_dom: List[Dict], curr_dom: List[Dict], covered: List[ShiftRegion]) -> List[ShiftRegion]:
+        """Regions from consistent DOM deltas of elements whose rows no pixel alignment covers."""
+        moved = []
+        for el_prev, el_curr in zip(prev_dom, curr_dom):
+            if el_prev.get("tag") != el_curr.get("tag"):
+                continue
+            try:
+                y, h = int(el_prev.get("y", 0)), int(el_prev.get("height", 0))
+                delta = (int(el_curr.get("x", 0)) - int(el_prev.get("x", 0)), int(el_curr.get("y", 0)) - y)
+            except (TypeError, ValueError):
+                continue
+            # Unmoved elements don't break a band: shifted_bbox keeps their own (0, 0) delta
+            if delta != (0, 0) and abs(delta[1]) <= self.max_shift and \
+                    not any(r.start_row <= y < r.end_row for r in covered):
+                moved.append((y, y + h, delta))
+
+        # Consecutive moved elements (in row order) sharing one delta form a band
+        bands = []
+        for start, end, delta in sorted(moved):
+            if bands and bands[-1][2] == delta:
+                bands[-1][1] = max(bands[-1][1], end)
+                bands[-1][3] += 1
+            else:
+                bands.append([start, end, delta, 1])
+
+        regions = []
+        for start, end, (dx, dy), count in bands:
+            if count < self.min_dom_elements:
+                continue
+            # Stop at the next pixel-aligned band rather than overlap it
+            end = min([end] + [r.start_row for r in covered if r.start_row > start])
+            if regions and start < regions[-1].end_row:
+                start = regions[-1].end_row
+            if start < end:
+                regions.append(ShiftRegion(start_row=start, end_row=end, dx=dx, dy=dy, elements=count))
+        return regions
+
+    def estimate(self, prev_img: Image.Image, curr_img: Image.Image,
+                 prev_dom: List[Dict], curr_dom: List[Dict]) -> ShiftMap:
+        print("\n📏 Estimating layout shifts")
+        offsets = self._row_offsets(prev_img, curr_img)
+        if offsets is None:
+            print("  ✅ No layout shift detected")
+            return ShiftMap()
+
+        # Collapse consecutive rows with the same vertical offset into regions
+        regions = []
+        for row in sorted(offsets):
+            dy = offsets[row]
+            if regions and regions[-1].end_row == row and regions[-1].dy == dy:
+                regions[-1].end_row = row + 1
+            else:
+                regions.append(ShiftRegion(start_row=row, end_row=row + 1, dx=0, dy=dy))
+
+        # Gaps between aligned bands (changed rows) inherit the offset of the band below them
+        merged = []
+        for region in regions:
+            if merged and merged[-1].dy == region.dy:
+                merged[-1].end_row = region.end_row
+                continue
+            if merged:
+                region.start_row = merged[-1].end_row
+            merged.append(region)
+        regions = merged
+
+        for region in regions:
+            region.dx, region.elements = self._dom_dx(prev_dom, curr_dom, region.start_row, region.end_row, region.dy)
+        regions = sorted(regions + self._dom_regions(prev_dom, curr_dom, regions), key=lambda r: r.start_row)
+
+        shift_map = ShiftMap(regions=regions, row_offsets=offsets)
+        for region in shift_map.moved_regions:
+            print(f"  ↕️ Rows {region.start_row}-{region.end_row} moved by ({region.dx},{region.dy}), "
+                  f"{region.elements} elements")
+        if not shift_map.moved_regions:
+            print("  ✅ No layout shift detected")
+        return shift_map
+
+    @staticmethod
+    def findings(shift_map: ShiftMap) -> List[Dict]:
+        """One layout-shift finding per moved region."""
+        return [{
+            "type": "layout_shift",
+            "rows": (region.start_row, region.end_row),
+            "dx": region.dx,
+            "dy": region.dy,
+            "elements": region.elements
+        } for region in shift_map.moved_regions]
@@ -0,0 +1,183 @@
+import heapq
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+from diff import VisualComparator
+from layout_shift import ShiftMap
+
+# (shared memory name, array shape) describing one decoded RGB screenshot
+ImageSpec = Tuple[str, Tuple[int, int, int]]
+
+
+class SharedImage:
+    """
+    Read-only view of a screenshot living in shared memory.
+
+    Implements the slice of the PIL.Image API VisualComparator uses (`size`, `crop`),
+    so workers only ever copy the crops they score, never the whole page.
+    """
+
+    def __init__(self, array: np.ndarray):
+        self.array = array
+        self.size = (array.shape[1], array.shape[0])
+
+    def crop(self, box: Tuple[int, int, int, int]) -> Image.Image:
+        x1, y1, x2, y2 = box
+        width, height = self.size
+        # Match PIL: regions outside the image are black
+        out = np.zeros((y2 - y1, x2 - x1, 3), dtype=np.uint8)
+        sx1, sy1, sx2, sy2 = max(x1, 0), max(y1, 0), min(x2, width), min(y2, height)
+        if sx1 < sx2 and sy1 < sy2:
+            out[sy1 - y1:sy2 - y1, sx1 - x1:sx2 - x1] = self.array[sy1:sy2, sx1:sx2]
+        return Image.fromarray(out, "RGB")
+
+
+def load_default_models():
+    """Default model_factory: the runner's LPIPS / CLIP wrappers on the VT_BACKEND* backend."""
+    from inference_backends import config_from_env, load_clip, load_lpips
+    config = config_from_env()
+    return load_lpips(config), load_clip(config)
+
+
+# ------------------------------
+# Worker process state: one comparator (and model instance) per process
+
+_worker = {}
+
+
+def _init_worker(model_factory: Callable, comparator_kwargs: Dict) -> None:
+    # A forwarded custom cascade brings its own models
+    lpips_model, clip_model = (None, None) if comparator_kwargs.get("cascade") else model_factory()
+    _worker["comparator"] = VisualComparator(lpips_model, clip_model, detect_shifts=False, **comparator_kwargs)
+    _worker["blocks"] = {}
+
+
+def _shared_image(spec: ImageSpec) -> SharedImage:
+    name, shape = spec
+    blocks = _worker["blocks"]
+    if name not in blocks:
+        # Pool workers share the parent's resource tracker, so attaching does not take ownership
+        blocks[name] = shared_memory.SharedMemory(name=name)
+    return SharedImage(np.ndarray(shape, dtype=np.uint8, buffer=blocks[name].buf))
+
+
+def _release_blocks(keep: Tuple[str, ...]) -> None:
+    blocks = _worker["blocks"]
+    for name in [n for n in blocks if n not in keep]:
+        blocks.pop(name).close()
+
+
+def _compare_shard(prev_spec: ImageSpec, curr_spec: ImageSpec, prev_dom: List[Dict], curr_dom: List[Dict],
+                   shift_map: Optional[ShiftMap], indices: FrozenSet[int]) -> Tuple[List[Dict], List[Dict], Dict[str, int], int]:
+    _release_blocks((prev_spec[0], curr_spec[0]))
+    comparator = _worker["comparator"]
+    comparator.cascade.reset_counts()
+    comparator.dedup_hits = 0
+    raw_rows = []
+    results, _ = comparator._compare_elements(
+        _shared_image(prev_spec), _shared_image(curr_spec), prev_dom, curr_dom, shift_map, raw_rows, indices
+    )
+    return results, raw_rows, dict(comparator.cascade.hits), comparator.dedup_hits
+
+
+class ParallelComparator(VisualComparator):
+    """
+    VisualComparator that shards one compare across a process pool.
+
+    Both decoded screenshots are copied once into shared memory; each worker builds its
+    own models from `model_factory` (a picklable callable returning (lpips, clip)), or uses
+    a forwarded `cascade`, which must then be picklable together with its models.
+
+    Elements are grouped by crop-pair content before dispatch and every group goes to a
+    single worker, so repeated components are still scored once (as in the single-process
+    comparator) however the page is sharded. Results are merged back in DOM order, so
+    output matches the single-process comparator.
+    """
+
+    def __init__(self, model_factory: Callable = load_default_models, workers: Optional[int] = None, **comparator_kwargs):
+        super().__init__(None, None, **comparator_kwargs)
+        self.workers = workers or os.cpu_count() or 1
+        worker_kwargs = {k: v for k, v in comparator_kwargs.items()
+                         if k in ("lpips_thresh", "clip_thresh", "min_size", "full_model_scores", "cascade")}
+        if worker_kwargs.get("cascade") is not None:
+            try:
+                pickle.dumps(worker_kwargs["cascade"])
+            except Exception as e:
+                raise ValueError(f"cascade= must be picklable (with its models) to run in worker processes: {e}")
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                        initargs=(model_factory, worker_kwargs))
+        print(f"🧵 Parallel compare with {self.workers} worker processes")
+
+    def close(self) -> None:
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _to_shared(img: Image.Image) -> Tuple[shared_memory.SharedMemory, ImageSpec]:
+        array = np.asarray(img.convert("RGB"), dtype=np.uint8)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=np.uint8, buffer=shm.buf)[...] = array
+        return shm, (shm.name, array.shape)
+
+    def _shards(self, prev_img: Image.Image, curr_img: Image.Image, prev_dom: List[Dict], curr_dom: List[Dict],
+                shift_map: Optional[ShiftMap], count: int) -> List[FrozenSet[int]]:
+        """Element indices per worker; pairs with identical crops always share a worker."""
+        groups = {}
+        for index, (el_prev, el_curr) in enumerate(zip(prev_dom[:count], curr_dom[:count])):
+            key = ("skip", index)
+            try:
+                sized = int(el_prev.get("width", 0)) >= self.min_size and int(el_prev.get("height", 0)) >= self.min_size
+            except (TypeError, ValueError):
+                sized = False
+            if sized and el_prev.get("tag") == el_curr.get("tag"):
+                boxes = self._compare_boxes(el_prev, el_curr, prev_img.size, curr_img.size, shift_map)
+                if boxes is not None:
+                    key = self._crop_pair_key(prev_img.crop(boxes[0]), curr_img.crop(boxes[1]))
+            groups.setdefault(key, []).append(index)
+
+        # Largest group first onto the least-loaded worker
+        loads = [(0, k, []) for k in range(min(self.workers, count))]
+        for group in sorted(groups.values(), key=len, reverse=True):
+            load, k, indices = heapq.heappop(loads)
+            indices.extend(group)
+            heapq.heappush(loads, (load + len(group), k, indices))
+        return [frozenset(indices) for _, _, indices in sorted(loads, key=lambda item: item[1]) if indices]
+
+    def _run_comparison(self, prev_img: Image.Image, curr_img: Image.Image, prev_dom: List[Dict], curr_dom: List[Dict],
+                        shift_map: Optional[ShiftMap]) -> Tuple[List[Dict], List[Dict], Dict[str, int]]:
+        count = min(len(prev_dom), len(curr_dom))
+        shards = self._shards(prev_img, curr_img, prev_dom, curr_dom, shift_map, count)
+        print(f"\n🧩 Sharding {count} element pairs across {len(shards)} workers")
+
+        prev_shm, prev_spec = self._to_shared(prev_img)
+        curr_shm, curr_spec = self._to_shared(curr_img)
+        try:
+            futures = [self.pool.submit(_compare_shard, prev_spec, curr_spec, prev_dom, curr_dom, shift_map, shard)
+                       for shard in shards]
+            outputs = [future.result() for future in futures]
+        finally:
+            for shm in (prev_shm, curr_shm):
+                shm.close()
+                shm.unlink()
+
+        tier_hits = {tier.name: 0 for tier in self.cascade.tiers}
+        self.dedup_hits = 0
+        merged = []
+        for results, raw_rows, hits, dedup_hits in outputs:
+            merged.extend(zip(results, raw_rows))
+            for name, hit_count in hits.items():
+                tier_hits[name] = tier_hits.get(name, 0) + hit_count
+            self.dedup_hits += dedup_hits
+
+        # Deterministic DOM order regardless of shard completion order
+        merged.sort(key=lambda pair: pair[1]["index"])
+        return [r for r, _ in merged], [raw for _, raw in merged], tier_hits
@@ -0,0 +1,130 @@
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+import numpy as np
+
+# Columns with a fixed array layout; every other column is kept as an object array
+BBOX_COLUMNS = ("bbox", "curr_bbox")
+SCORE_COLUMNS = ("LPIPS", "CLIP")
+FLAG_COLUMN = "Change_Flag"
+
+
+class ResultTable:
+    """
+    Lightweight columnar per-element result table used instead of a pandas DataFrame.
+
+    Records are unpacked once into NumPy columns: Change_Flag as int8, bboxes as (n, 4)
+    int arrays, model scores as float arrays (NaN = tier not reached), anything else as an
+    object array. Filtering and summaries are vectorized; dicts are rebuilt only by
+    `to_records()` / iteration. All records are expected to share one schema.
+    Post-build flag edits (e.g. containment suppression) go through `clear_changes()`.
+    Call `to_dataframe()` when pandas is really needed.
+    """
+    __slots__ = ("_columns", "_length")
+
+    def __init__(self, records: Sequence[Dict]):
+        records = list(records)
+        names = list(dict.fromkeys(key for record in records for key in record))
+        columns = {}
+        for name in names:
+            values = [record.get(name) for record in records]
+            if name == FLAG_COLUMN:
+                columns[name] = np.array([int(v or 0) for v in values], dtype=np.int8)
+            elif name in BBOX_COLUMNS:
+                columns[name] = np.array([v if v is not None else (0, 0, 0, 0) for v in values],
+                                         dtype=np.int64).reshape(len(values), 4)
+            elif name in SCORE_COLUMNS:
+                columns[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            else:
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+                columns[name] = column
+        self._columns = columns
+        self._length = len(records)
+
+    @classmethod
+    def _from_columns(cls, columns: Dict[str, np.ndarray], length: int) -> "ResultTable":
+        table = cls.__new__(cls)
+        table._columns = columns
+        table._length = length
+        return table
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.to_records())
+
+    def __getitem__(self, key: Union[str, np.ndarray]) -> Union[List, "ResultTable"]:
+        """table["tag"] -> column values; table[bool_mask] -> filtered table."""
+        if isinstance(key, str):
+            return self.column(key)
+        mask = np.asarray(key, dtype=bool)
+        if mask.shape != (self._length,):
+            raise ValueError(f"Boolean mask of shape {mask.shape} does not match {self._length} rows")
+        return ResultTable._from_columns({name: column[mask] for name, column in self._columns.items()},
+                                         int(mask.sum()))
+
+    @property
+    def empty(self) -> bool:
+        return self._length == 0
+
+    @property
+    def flags(self) -> np.ndarray:
+        return self._columns.get(FLAG_COLUMN, np.zeros(self._length, dtype=np.int8))
+
+    def array(self, name: str) -> Optional[np.ndarray]:
+        """The stored column array itself (None if the column does not exist)."""
+        return self._columns.get(name)
+
+    def column(self, name: str) -> List:
+        if name not in self._columns:
+            return [None] * self._length
+        return [self._value(name, i) for i in range(self._length)]
+
+    def numeric(self, name: str) -> np.ndarray:
+        """Float column with NaN for missing values (e.g. LPIPS of hash-decided elements)."""
+        column = self._columns.get(name)
+        if column is None:
+            return np.full(self._length, np.nan)
+        if column.dtype == object:
+            return np.array([np.nan if v is None else v for v in column], dtype=np.float64)
+        return column.astype(np.float64)
+
+    def clear_changes(self, rows: np.ndarray) -> None:
+        """Unflag rows (bool mask or indices), including the per-model *_Detects_Change columns."""
+        rows = np.asarray(rows)
+        if rows.dtype == bool and rows.shape != (self._length,):
+            raise ValueError(f"Boolean mask of shape {rows.shape} does not match {self._length} rows")
+        for name, column in self._columns.items():
+            if name == FLAG_COLUMN or name.endswith("_Detects_Change"):
+                column[rows] = 0
+
+    def changed(self) -> "ResultTable":
+        return self[self.flags == 1]
+
+    def summary(self) -> Dict:
+        total = self._length
+        changed = int(np.count_nonzero(self.flags))
+        return {
+            "total_regions": total,
+            "changed_regions": changed,
+            "change_percent": round(changed / total * 100, 2) if total else 0.0
+        }
+
+    def _value(self, name: str, i: int):
+        column = self._columns[name]
+        if name in BBOX_COLUMNS:
+            return tuple(column[i].tolist())
+        if name in SCORE_COLUMNS:
+            value = column[i]
+            return None if np.isnan(value) else float(value)
+        if name == FLAG_COLUMN:
+            return int(column[i])
+        return column[i]
+
+    def to_records(self) -> List[Dict]:
+        names = list(self._columns)
+        return [{name: self._value(name, i) for name in names} for i in range(self._length)]
+
+    def to_dataframe(self):
+        import pandas as pd
+        return pd.DataFrame(self.to_records())
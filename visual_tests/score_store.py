@@ -0,0 +1,162 @@
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+
+# Column layout of a stored score file; pass 1 = unmasked, pass 2 = masked verification
+SCORE_COLUMNS = ("tag", "bbox", "size", "lpips", "clip", "tier", "changed")
+NOT_SCORED = -1
+
+
+def build_score_columns(raw_rows: List[Dict], lpips_thresh: float, clip_thresh: float, min_size: int) -> Dict[str, np.ndarray]:
+    """Packs per-element raw scores from both passes into column arrays (NaN = tier not reached)."""
+    n = len(raw_rows)
+    lpips = np.full((n, 2), np.nan, dtype=np.float32)
+    clip = np.full((n, 2), np.nan, dtype=np.float32)
+    changed = np.full((n, 2), NOT_SCORED, dtype=np.int8)
+    tiers = [["", ""] for _ in range(n)]
+
+    for i, row in enumerate(raw_rows):
+        for p in (0, 1):
+            if row["changed"][p] is None:
+                continue
+            if row["lpips"][p] is not None:
+                lpips[i, p] = row["lpips"][p]
+            if row["clip"][p] is not None:
+                clip[i, p] = row["clip"][p]
+            changed[i, p] = int(row["changed"][p])
+            tiers[i][p] = row["tier"][p] or ""
+
+    return {
+        # dtype=str sizes the columns to the longest value (custom element tags, custom tier names)
+        "tag": np.array([row["tag"] for row in raw_rows], dtype=str),
+        "bbox": np.array([row["bbox"] for row in raw_rows], dtype=np.int32).reshape(n, 4),
+        "size": np.array([row["size"] for row in raw_rows], dtype=np.int32).reshape(n, 2),
+        "lpips": lpips,
+        "clip": clip,
+        "tier": np.array(tiers, dtype=str).reshape(n, 2),
+        "changed": changed,
+        "thresholds": np.array([lpips_thresh, clip_thresh, min_size], dtype=np.float64)
+    }
+
+
+def save_scores(path: str, columns: Dict[str, np.ndarray]) -> None:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.savez_compressed(path, **columns)
+    print(f"[✓] Saved {len(columns['tag'])} element scores to {path}")
+
+
+def load_scores(path: str) -> Dict[str, np.ndarray]:
+    with np.load(path, allow_pickle=False) as data:
+        return {key: data[key] for key in data.files}
+
+
+def _decide(lpips: np.ndarray, clip: np.ndarray, tier: np.ndarray, stored: np.ndarray,
+            lpips_thresh: float, clip_thresh: float):
+    """Re-applies thresholds to one pass; returns (changed, stale) where stale rows lacked a needed score."""
+    lp_known, clip_known = ~np.isnan(lpips), ~np.isnan(clip)
+    hit = (lp_known & (lpips > lpips_thresh)) | (clip_known & (clip < clip_thresh))
+    clean = lp_known & clip_known & ~hit
+    # Identical crops are unchanged at any threshold; SSIM decisions do not depend on model thresholds
+    hashed, ssim = tier == "hash", tier == "ssim"
+    changed = np.where(hit, True, np.where(clean | hashed, False, stored == 1))
+    stale = ~(hit | clean | hashed | ssim)
+    return changed, stale
+
+
+def suppress_contained(bbox: np.ndarray, changed: np.ndarray) -> np.ndarray:
+    """Clears the flag of changed containers that hold a smaller changed element (keep leaves)."""
+    idx = np.flatnonzero(changed)
+    if len(idx) < 2:
+        return changed
+    boxes = bbox[idx]
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    order = np.argsort(area, kind="stable")
+    boxes, idx = boxes[order], idx[order]
+
+    # contains[o, i]: box o fully encloses box i
+    contains = ((boxes[:, None, 0] <= boxes[None, :, 0]) & (boxes[:, None, 1] <= boxes[None, :, 1]) &
+                (boxes[:, None, 2] >= boxes[None, :, 2]) & (boxes[:, None, 3] >= boxes[None, :, 3]))
+    contains &= np.tri(len(idx), k=-1, dtype=bool)  # only smaller (earlier) elements can suppress
+    result = changed.copy()
+    result[idx[contains.any(axis=1)]] = False
+    return result
+
+
+def reevaluate(columns: Dict[str, np.ndarray], lpips_thresh: float, clip_thresh: float,
+               min_size: Optional[int] = None, suppress: bool = False) -> Dict:
+    """
+    Re-applies thresholds, size filtering and (optionally) containment suppression to stored scores.
+
+    Elements whose new verdict needs a score that was never computed (a tier the cascade
+    skipped, or a masked pass that never ran) keep their stored verdict and are counted as stale.
+    min_size can only be raised: elements below the original min_size were never scored.
+    """
+    size = columns["size"]
+    keep = np.ones(len(size), dtype=bool)
+    if min_size is not None:
+        keep = (size[:, 0] >= min_size) & (size[:, 1] >= min_size)
+
+    lpips, clip, tier, stored = columns["lpips"], columns["clip"], columns["tier"], columns["changed"]
+    first, stale = _decide(lpips[:, 0], clip[:, 0], tier[:, 0], stored[:, 0], lpips_thresh, clip_thresh)
+    second, stale_second = _decide(lpips[:, 1], clip[:, 1], tier[:, 1], stored[:, 1], lpips_thresh, clip_thresh)
+
+    has_second = stored[:, 1] != NOT_SCORED
+    changed = np.where(first & has_second, second, first)
+    stale = np.where(first, np.where(has_second, stale_second, True), stale)
+    changed &= keep
+
+    if suppress:
+        changed = suppress_contained(columns["bbox"], changed)
+
+    total = int(keep.sum())
+    changed_count = int(changed.sum())
+    return {
+        "changed": changed,
+        "keep": keep,
+        "summary": {
+            "total_regions": total,
+            "changed_regions": changed_count,
+            "change_percent": round(changed_count / total * 100, 2) if total else 0.0,
+            "stale_regions": int((stale & keep).sum())
+        }
+    }
+
+
+def find_score_files(paths: List[str]) -> List[Path]:
+    files = []
+    for path in map(Path, paths):
+        files.extend(sorted(path.rglob("*_scores_vs_*.npz")) if path.is_dir() else [path])
+    return files
+
+
+if __name__ == "__main__":
+    import argparse
+    import itertools
+
+    parser = argparse.ArgumentParser(description="Re-evaluate stored compare scores with new thresholds.")
+    parser.add_argument("paths", nargs="+", help="Score files or directories (e.g. visual_tests/baseline)")
+    parser.add_argument("--lpips", type=float, nargs="+", default=[0.03])
+    parser.add_argument("--clip", type=float, nargs="+", default=[0.98])
+    parser.add_argument("--min-size", type=int, nargs="+", default=[None])
+    parser.add_argument("--suppress-contained", action="store_true")
+    args = parser.parse_args()
+
+    files = find_score_files(args.paths)
+    stores = [(f, load_scores(str(f))) for f in files]
+    print(f"[✓] Loaded {len(stores)} score files")
+
+    for lp, cl, ms in itertools.product(args.lpips, args.clip, args.min_size):
+        start = time.perf_counter()
+        changed = total = stale = 0
+        for path, columns in stores:
+            summary = reevaluate(columns, lp, cl, ms, args.suppress_contained)["summary"]
+            changed += summary["changed_regions"]
+            total += summary["total_regions"]
+            stale += summary["stale_regions"]
+            if len(stores) == 1:
+                print(f"    {path.name}: {summary}")
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"[•] LPIPS={lp} CLIP={cl} min_size={ms}: {changed}/{total} changed, "
+              f"{stale} stale ({elapsed:.1f}ms)")
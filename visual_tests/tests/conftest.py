@@ -0,0 +1,5 @@
+import os
+import sys
+
+# visual_tests modules import each other as top-level modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,54 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+
+def _mean_abs_diff(a, b):
+    return float(np.abs(np.asarray(a, dtype=np.float64) - np.asarray(b, dtype=np.float64)).mean() / 255)
+
+
+class FakeLPIPS:
+    """Deterministic stand-in for LPIPSWrapper: mean absolute pixel difference."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def compute_distance(self, crop_prev, crop_curr):
+        self.calls += 1
+        return _mean_abs_diff(crop_prev, crop_curr)
+
+
+class FakeCLIP:
+    """Deterministic stand-in for CLIPWrapper: 1 - mean absolute pixel difference."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def compute_similarity(self, crop_prev, crop_curr):
+        self.calls += 1
+        return 1.0 - _mean_abs_diff(crop_prev, crop_curr)
+
+
+def fake_models():
+    return FakeLPIPS(), FakeCLIP()
+
+
+def text_crop(text, size=(400, 60)):
+    img = Image.new("RGB", size, "white")
+    ImageDraw.Draw(img).text((10, 20), text, fill="black")
+    return img
+
+
+def card_page(banner=50, cards=10, height=800, changed_card=None):
+    """A banner followed by coloured cards, with a matching DOM snapshot."""
+    img = Image.new("RGB", (400, height), "white")
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([0, 0, 399, banner - 1], fill="navy")
+    dom = [{"id": "el_0", "tag": "header", "x": 0, "y": 0, "width": 400, "height": banner}]
+    for i in range(cards):
+        y = banner + 10 + i * 60
+        draw.rectangle([20, y, 379, y + 49], fill=(i * 20 % 256, 100, 200 - i * 10))
+        draw.text((30, y + 10), f"Card {i}", fill="white")
+        if i == changed_card:
+            draw.rectangle([40, y + 5, 200, y + 40], fill="red")
+        dom.append({"id": f"el_{i + 1}", "tag": "div", "x": 20, "y": y, "width": 360, "height": 50})
+    return {"image": img, "dom": dom}
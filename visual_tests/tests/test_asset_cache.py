@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+from asset_cache import STUB_PNG, AssetCache
+
+
+class FakeRequest:
+    def __init__(self, url, method="GET", resource_type="image"):
+        self.url, self.method, self.resource_type = url, method, resource_type
+
+
+class FakeResponse:
+    def __init__(self, body, status=200, content_type="image/png"):
+        self._body, self.status, self.headers = body, status, {"content-type": content_type}
+
+    def body(self):
+        return self._body
+
+
+class FakeRoute:
+    """Records how a Playwright route was settled."""
+
+    def __init__(self, url, method="GET", resource_type="image", response=None, error=None):
+        self.request = FakeRequest(url, method, resource_type)
+        self._response, self._error = response, error
+        self.settled = None
+
+    def fetch(self):
+        if self._error:
+            raise self._error
+        return self._response
+
+    def fulfill(self, **kwargs):
+        self.settled = ("fulfill", kwargs)
+
+    def abort(self, reason=None):
+        self.settled = ("abort", reason)
+
+    def continue_(self):
+        self.settled = ("continue", None)
+
+
+URL = "https://cdn.example.com/logo.png"
+
+
+def _record(store, route):
+    cache = AssetCache(str(store), mode="record")
+    cache.handle(route)
+    cache.save()
+    return cache
+
+
+def test_record_then_replay(tmp_path):
+    _record(tmp_path, FakeRoute(URL, response=FakeResponse(b"png-bytes")))
+    route = FakeRoute(URL)
+    cache = AssetCache(str(tmp_path), mode="replay")
+    cache.handle(route)
+
+    kind, kwargs = route.settled
+    assert kind == "fulfill" and kwargs["body"] == b"png-bytes" and kwargs["status"] == 200
+    assert cache.stats["replayed"] == 1
+
+
+def test_methods_are_recorded_separately(tmp_path):
+    cache = AssetCache(str(tmp_path), mode="record")
+    cache.handle(FakeRoute(URL, response=FakeResponse(b"get")))
+    cache.handle(FakeRoute(URL, method="POST", response=FakeResponse(b"post", content_type="application/json")))
+    cache.save()
+
+    replay = AssetCache(str(tmp_path), mode="replay")
+    for method, body in (("GET", b"get"), ("POST", b"post")):
+        route = FakeRoute(URL, method=method)
+        replay.handle(route)
+        assert route.settled[1]["body"] == body
+
+
+def test_legacy_url_keys_replay_as_get(tmp_path):
+    _record(tmp_path, FakeRoute(URL, response=FakeResponse(b"png-bytes")))
+    index_path = tmp_path / "index.json"
+    index = json.loads(index_path.read_text())
+    index_path.write_text(json.dumps({URL: index[f"GET {URL}"]}))
+
+    replay = AssetCache(str(tmp_path), mode="replay")
+    get, post = FakeRoute(URL), FakeRoute(URL, method="POST")
+    replay.handle(get)
+    replay.handle(post)
+    assert get.settled[1]["body"] == b"png-bytes"
+    assert post.settled[1]["body"] == STUB_PNG
+
+
+def test_failed_fetch_falls_back_to_policy(tmp_path):
+    cache = AssetCache(str(tmp_path), mode="record", unknown_hosts="block")
+    route = FakeRoute(URL, error=ConnectionError("host unreachable"))
+    cache.handle(route)
+
+    assert route.settled == ("abort", "blockedbyclient")
+    assert cache.stats["record_failed"] == 1 and cache.index == {}
+
+
+@pytest.mark.parametrize("policy,resource_type,expected", [
+    ("stub", "image", ("fulfill", STUB_PNG)),
+    ("stub", "script", ("fulfill", b"")),
+    ("block", "image", ("abort", "blockedbyclient")),
+    ("passthrough", "image", ("continue", None)),
+])
+def test_unknown_assets_follow_policy(tmp_path, policy, resource_type, expected):
+    route = FakeRoute(URL, resource_type=resource_type)
+    AssetCache(str(tmp_path), mode="replay", unknown_hosts=policy).handle(route)
+
+    kind, detail = route.settled
+    assert kind == expected[0]
+    assert (detail["body"] if kind == "fulfill" else detail) == expected[1]
+
+
+def test_missing_blob_falls_back_to_policy(tmp_path):
+    _record(tmp_path, FakeRoute(URL, response=FakeResponse(b"png-bytes")))
+    for blob in (tmp_path / "blobs").iterdir():
+        blob.unlink()
+
+    route = FakeRoute(URL)
+    cache = AssetCache(str(tmp_path), mode="replay", unknown_hosts="stub")
+    cache.handle(route)
+    assert route.settled[1]["body"] == STUB_PNG and cache.stats["stubbed"] == 1
@@ -0,0 +1,66 @@
+import copy
+
+from PIL import Image
+
+from detectors import ExactHashTier, LazyModel, SSIMTier, build_default_cascade
+from helpers import FakeCLIP, FakeLPIPS, text_crop
+
+
+def test_identical_crops_accepted_by_hash():
+    crop = text_crop("$10.00")
+    assert ExactHashTier().evaluate(crop, crop.copy())[0] is False
+
+
+def test_ssim_does_not_accept_small_text_change():
+    prev, curr = text_crop("$10.00"), text_crop("$19.00")
+    decision, scores = SSIMTier().evaluate(prev, curr)
+    assert decision is not False
+    assert scores["SSIM"] > 0.99  # mean SSIM alone would have accepted it
+
+
+def test_ssim_does_not_accept_small_text_change_in_wide_crop():
+    prev, curr = text_crop("$10.00", (1280, 400)), text_crop("$19.00", (1280, 400))
+    assert SSIMTier().evaluate(prev, curr)[0] is not False
+
+
+def test_cascade_flags_small_text_change():
+    lpips, clip = FakeLPIPS(), FakeCLIP()
+    cascade = build_default_cascade(lpips, clip, lpips_thresh=0.0001)
+    is_changed, _, tier = cascade.evaluate(text_crop("$10.00"), text_crop("$19.00"))
+    assert is_changed and tier == "lpips"
+
+
+def test_ssim_accepts_near_identical_crops():
+    prev = text_crop("$10.00")
+    curr = prev.copy()
+    curr.putpixel((399, 59), (254, 254, 254))
+    assert SSIMTier().evaluate(prev, curr)[0] is False
+
+
+def test_lazy_model_copies_without_loading():
+    model = LazyModel(FakeLPIPS)
+    clone = copy.copy(model)
+    assert not model.loaded and not clone.loaded
+    assert clone.compute_distance(text_crop("a"), text_crop("a")) == 0.0
+    assert clone.loaded and not model.loaded
+
+
+def _flat(colour, size=(120, 40)):
+    return Image.new("RGB", size, colour)
+
+
+def test_ssim_does_not_accept_equal_luminance_recolour():
+    # Blue -> red button and red -> green: near-identical grayscale, very different colour
+    for prev, curr in (((37, 99, 235), (220, 38, 38)), ((255, 0, 0), (0, 130, 0))):
+        assert SSIMTier().evaluate(_flat(prev), _flat(curr))[0] is not False
+
+
+def test_ssim_does_not_accept_flat_brightness_change():
+    for level in (100, 200):
+        prev, curr = _flat((level,) * 3), _flat((level + 20,) * 3)
+        assert SSIMTier().evaluate(prev, curr)[0] is not False
+
+
+def test_cascade_flags_recolour():
+    cascade = build_default_cascade(FakeLPIPS(), FakeCLIP())
+    assert cascade.evaluate(_flat((37, 99, 235)), _flat((220, 38, 38)))[0] is True
@@ -0,0 +1,51 @@
+import time
+
+from PIL import Image, ImageDraw
+
+from detectors import LazyModel
+from diff import VisualComparator
+from helpers import FakeCLIP, FakeLPIPS, card_page, fake_models
+
+
+def _rows_page(rows, changed=(), repeated=False):
+    """Flat list of rows; repeated=True draws every row identically."""
+    img = Image.new("RGB", (400, rows * 40 + 20), "white")
+    draw = ImageDraw.Draw(img)
+    dom = []
+    for i in range(rows):
+        y = 10 + i * 40
+        draw.rectangle([10, y, 389, y + 29], fill=(40, 80, 160) if repeated else (40, 60 + i * 4, 120))
+        draw.text((20, y + 8), "Item" if repeated else f"Row {i}", fill="white")
+        if i in changed:
+            draw.rectangle([200, y, 210 + i * 4, y + 29], fill="yellow")
+        dom.append({"id": f"el_{i}", "tag": "div", "x": 10, "y": y, "width": 380, "height": 30})
+    return {"image": img, "dom": dom}
+
+
+def _compare(prev, curr):
+    return VisualComparator(*fake_models(), detect_shifts=False).compare(prev, curr)
+
+
+def test_masked_pass_does_not_count_as_dedup():
+    rows = 40
+    result = _compare(_rows_page(rows), _rows_page(rows, changed=range(rows)))
+    assert result["summary"]["changed_regions"] == rows
+    assert result["summary"]["dedup_hits"] == 0
+
+
+def test_repeated_components_are_deduplicated():
+    rows = 12
+    result = _compare(_rows_page(rows, repeated=True), _rows_page(rows, repeated=True))
+    assert result["summary"]["dedup_hits"] == rows - 1
+
+
+def test_no_change_run_is_fast_and_loads_no_models():
+    page = card_page(cards=165, height=10000)
+    lpips, clip = LazyModel(FakeLPIPS), LazyModel(FakeCLIP)
+    comparator = VisualComparator(lpips, clip)
+
+    start = time.perf_counter()
+    result = comparator.compare(page, {"image": page["image"].copy(), "dom": [dict(el) for el in page["dom"]]})
+    assert time.perf_counter() - start < 1.0
+    assert result["summary"]["changed_regions"] == 0
+    assert not lpips.loaded and not clip.loaded
@@ -0,0 +1,156 @@
+import json
+
+import pytest
+from PIL import Image, ImageDraw
+
+from helpers import FakeCLIP, FakeLPIPS, card_page, text_crop
+from inference_backends import (
+    BackendConfig, ImageEncoderOverride, apply_backend, build_corpus_from_baseline, config_from_env,
+    load_crop_corpus, measure_drift, save_crop_pair
+)
+
+
+def _write_commit(baseline, commit, page):
+    (baseline / commit).mkdir(parents=True)
+    page["image"].save(baseline / commit / "test_home_page.png")
+    (baseline / commit / "test_home_page_dom.json").write_text(json.dumps(page["dom"]))
+
+
+def test_build_corpus_from_baseline_prefers_differing_pairs(tmp_path):
+    baseline = tmp_path / "baseline"
+    _write_commit(baseline, "aaaaaaaa1", card_page())
+    _write_commit(baseline, "bbbbbbbb2", card_page(changed_card=3))
+    (baseline / "commit_cache.json").write_text(json.dumps({"history": ["aaaaaaaa1", "bbbbbbbb2"]}))
+
+    saved = build_corpus_from_baseline(str(tmp_path / "corpus"), baseline, per_pair=2)
+    corpus = load_crop_corpus(str(tmp_path / "corpus"))
+
+    assert saved == 2 and len(corpus) == 2
+    _, prev, curr = corpus[0]
+    assert prev.tobytes() != curr.tobytes()
+
+
+def test_measure_drift_reports_flag_flips(tmp_path):
+    save_crop_pair(str(tmp_path), "price", text_crop("$10.00"), text_crop("$19.00"))
+    save_crop_pair(str(tmp_path), "same", text_crop("$10.00"), text_crop("$10.00"))
+    corpus = load_crop_corpus(str(tmp_path))
+
+    class ShiftedLPIPS(FakeLPIPS):
+        def compute_distance(self, crop_prev, crop_curr):
+            return super().compute_distance(crop_prev, crop_curr) * 0.1
+
+    same = measure_drift((FakeLPIPS(), FakeCLIP()), (FakeLPIPS(), FakeCLIP()), corpus, lpips_thresh=0.0001, clip_thresh=0.0)
+    drifted = measure_drift((FakeLPIPS(), FakeCLIP()), (ShiftedLPIPS(), FakeCLIP()), corpus,
+                            lpips_thresh=0.0001, clip_thresh=0.0)
+
+    assert same["flag_flips"] == [] and same["lpips_max_drift"] == 0
+    assert drifted["flag_flips"] == ["price"]
+
+
+def test_image_encoder_override_keeps_other_attributes():
+    class Clip:
+        logit_scale = 100
+
+        def encode_text(self, tokens):
+            return "text"
+
+    override = ImageEncoderOverride(Clip(), lambda pixels: "backend")
+    assert override.encode_image(None) == "backend"
+    assert override.encode_text(None) == "text" and override.logit_scale == 100
+
+
+def test_config_from_env():
+    assert config_from_env({}).is_reference
+    config = config_from_env({"VT_BACKEND": "ONNX", "VT_BACKEND_QUANTIZE": "1", "VT_BACKEND_THREADS": "4",
+                              "VT_BACKEND_EXPORT_DIR": "/tmp/models", "VT_BACKEND_CORPUS": "corpus"})
+    assert config == BackendConfig(kind="onnx", quantize=True, num_threads=4, export_dir="/tmp/models",
+                                   corpus_dir="corpus")
+    with pytest.raises(ValueError):
+        config_from_env({"VT_BACKEND": "tensorrt"})
+
+
+class _TinyWrapper:
+    """LPIPS-shaped wrapper: `.model` takes an image pair and returns a distance tensor."""
+
+    def __init__(self):
+        import torch
+
+        class Net(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.features = torch.nn.Sequential(torch.nn.Conv2d(3, 8, 3), torch.nn.ReLU(), torch.nn.Conv2d(8, 8, 3))
+
+            def forward(self, a, b):
+                return (self.features(a) - self.features(b)).abs().mean(dim=(1, 2, 3))
+
+        torch.manual_seed(0)
+        self.model = Net().eval()
+
+    def compute_distance(self, a, b):
+        import torch
+        with torch.inference_mode():
+            return float(self.model(a, b)[0])
+
+
+@pytest.mark.parametrize("kind,quantize", [("eager", True), ("torchscript", False), ("torchscript", True),
+                                           ("onnx", False), ("onnx", True)])
+def test_backend_matches_reference_end_to_end(tmp_path, kind, quantize):
+    torch = pytest.importorskip("torch")
+    if kind == "onnx":
+        pytest.importorskip("onnxruntime")
+
+    torch.manual_seed(1)
+    batches = [(torch.rand(1, 3, 32, 32), torch.rand(1, 3, 32, 32)) for _ in range(8)]
+    reference = _TinyWrapper()
+    config = BackendConfig(kind=kind, quantize=quantize, num_threads=1, export_dir=str(tmp_path))
+    candidate = apply_backend(_TinyWrapper(), config, batches[0], "tiny", batches)
+
+    for a, b in batches:
+        assert candidate.compute_distance(a, b) == pytest.approx(reference.compute_distance(a, b),
+                                                                 rel=0.1 if quantize else 1e-4)
+    if kind != "eager":
+        # A second build reuses the cached artifact instead of exporting again
+        artifact = max(tmp_path.iterdir(), key=lambda p: p.stat().st_mtime)
+        mtime = artifact.stat().st_mtime_ns
+        apply_backend(_TinyWrapper(), config, batches[0], "tiny", batches)
+        assert artifact.stat().st_mtime_ns == mtime
+
+
+class _TinyClip:
+    """ViT-shaped stand-in: Linear-dominated image tower behind `encode_image`."""
+
+    def __init__(self):
+        import torch
+
+        class Tower(torch.nn.Module):
+            def __init__(self):
+                super().__init__()
+                self.patch = torch.nn.Conv2d(3, 16, 8, stride=8)
+                self.mlp = torch.nn.Sequential(torch.nn.Linear(16, 128), torch.nn.GELU(), torch.nn.Linear(128, 32))
+
+            def encode_image(self, pixels):
+                return self.mlp(self.patch(pixels).flatten(2).transpose(1, 2)).mean(dim=1)
+
+        torch.manual_seed(0)
+        self.model = Tower().eval()
+
+    def embed(self, pixels):
+        import torch
+        with torch.inference_mode():
+            return self.model.encode_image(pixels)
+
+
+@pytest.mark.parametrize("kind", ["torchscript", "onnx"])
+def test_quantized_clip_image_encoder_end_to_end(tmp_path, kind):
+    torch = pytest.importorskip("torch")
+    if kind == "onnx":
+        pytest.importorskip("onnxruntime")
+
+    torch.manual_seed(1)
+    batches = [(torch.rand(1, 3, 32, 32),) for _ in range(4)]
+    config = BackendConfig(kind=kind, quantize=True, export_dir=str(tmp_path))
+    reference, candidate = _TinyClip(), apply_backend(_TinyClip(), config, batches[0], "clip_image", batches,
+                                                      image_encoder_only=True)
+    for (pixels,) in batches:
+        similarity = torch.nn.functional.cosine_similarity(candidate.embed(pixels), reference.embed(pixels))
+        assert float(similarity) > 0.99
@@ -0,0 +1,102 @@
+import time
+
+from PIL import Image, ImageDraw
+
+from diff import VisualComparator
+from helpers import FakeCLIP, FakeLPIPS
+from layout_shift import LayoutShiftEstimator
+
+
+def _page(blocks, height=None, insert_at=None, insert_height=0):
+    """Text blocks on white background; optionally an inserted block pushes later ones down."""
+    height = height or 40 + blocks * 60 + insert_height
+    img = Image.new("RGB", (400, height), "white")
+    draw = ImageDraw.Draw(img)
+    dom, y = [], 20
+    for i in range(blocks):
+        if i == insert_at:
+            draw.rectangle([20, y, 379, y + insert_height - 11], fill="orange")
+            y += insert_height
+        draw.rectangle([20, y, 379, y + 49], fill=(30, 60 + i % 150, 120))
+        draw.text((30, y + 15), f"Block {i}", fill="white")
+        dom.append({"id": f"el_{i}", "tag": "div", "x": 20, "y": y, "width": 360, "height": 50})
+        y += 60
+    return img, dom
+
+
+def test_identical_pages_have_no_shift():
+    img, dom = _page(20)
+    shift_map = LayoutShiftEstimator().estimate(img, img.copy(), dom, dom)
+    assert shift_map.regions == [] and shift_map.moved_regions == []
+
+
+def test_top_insertion_shifts_everything_below():
+    prev_img, prev_dom = _page(20)
+    curr_img, curr_dom = _page(20, insert_at=0, insert_height=40)
+    shift_map = LayoutShiftEstimator().estimate(prev_img, curr_img, prev_dom, curr_dom)
+
+    assert {r.dy for r in shift_map.moved_regions} == {40}
+    for el_prev, el_curr in zip(prev_dom, curr_dom):
+        bbox = (el_prev["x"], el_prev["y"], el_prev["x"] + 360, el_prev["y"] + 50)
+        assert shift_map.shifted_bbox(el_prev, el_curr, bbox)[1] == el_curr["y"]
+
+
+def test_mid_page_insertion_only_shifts_lower_blocks():
+    prev_img, prev_dom = _page(20)
+    curr_img, curr_dom = _page(20, insert_at=10, insert_height=30)
+    shift_map = LayoutShiftEstimator().estimate(prev_img, curr_img, prev_dom, curr_dom)
+
+    moved = shift_map.moved_regions
+    assert len(moved) == 1 and moved[0].dy == 30
+    assert moved[0].start_row > prev_dom[9]["y"]
+    findings = LayoutShiftEstimator.findings(shift_map)
+    assert len(findings) == 1 and findings[0]["elements"] == 10
+
+
+def test_tall_mostly_blank_pages_stay_fast():
+    prev_img, prev_dom = _page(20, height=10000)
+    curr_img, curr_dom = _page(20, height=10000, insert_at=5, insert_height=30)
+    estimator = LayoutShiftEstimator()
+
+    start = time.perf_counter()
+    estimator.estimate(prev_img, prev_img.copy(), prev_dom, prev_dom)
+    shift_map = estimator.estimate(prev_img, curr_img, prev_dom, curr_dom)
+    elapsed = time.perf_counter() - start
+
+    assert shift_map.moved_regions and shift_map.moved_regions[0].dy == 30
+    assert elapsed < 1.0
+
+
+def _sidebar_page(sidebar_width, cards=10):
+    """A sidebar to the left of a column of cards; a wider sidebar pushes every card right."""
+    img = Image.new("RGB", (500, 40 + cards * 60), "white")
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([0, 0, sidebar_width - 1, img.height - 1], fill=(220, 220, 230))
+    dom = [{"id": "sidebar", "tag": "nav", "x": 0, "y": 0, "width": sidebar_width, "height": img.height}]
+    for i in range(cards):
+        x, y = sidebar_width + 20, 20 + i * 60
+        draw.rectangle([x, y, x + 299, y + 49], fill=(30, 60 + i * 8, 120))
+        draw.text((x + 10, y + 15), f"Card {i}", fill="white")
+        dom.append({"id": f"card_{i}", "tag": "div", "x": x, "y": y, "width": 300, "height": 50})
+    return {"image": img, "dom": dom}
+
+
+def test_horizontal_only_shift_uses_dom_deltas():
+    prev, curr = _sidebar_page(100), _sidebar_page(120)
+    shift_map = LayoutShiftEstimator().estimate(prev["image"], curr["image"], prev["dom"], curr["dom"])
+
+    moved = shift_map.moved_regions
+    assert len(moved) == 1 and (moved[0].dx, moved[0].dy) == (20, 0) and moved[0].elements == 10
+    for el_prev, el_curr in zip(prev["dom"][1:], curr["dom"][1:]):
+        bbox = (el_prev["x"], el_prev["y"], el_prev["x"] + 300, el_prev["y"] + 50)
+        assert shift_map.shifted_bbox(el_prev, el_curr, bbox)[0] == el_curr["x"]
+
+
+def test_horizontal_shift_leaves_cards_unflagged():
+    lpips, clip = FakeLPIPS(), FakeCLIP()
+    result = VisualComparator(lpips, clip).compare(_sidebar_page(100), _sidebar_page(120))
+
+    assert len(result["summary"]["layout_shifts"]) == 1
+    cards = [r for r in result["scores"].to_records() if r["tag"] == "div"]
+    assert all(r["Change_Flag"] == 0 and r["Tier"] == "hash" for r in cards)
+    assert lpips.calls <= 1  # only the resized sidebar can reach a model
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from detectors import DetectorCascade, ExactHashTier, LPIPSTier
+from diff import VisualComparator
+from helpers import FakeLPIPS, fake_models
+from parallel_compare import ParallelComparator
+
+
+def _wrapper_child_page(changed):
+    """30 wrapper/child pairs sharing the same rect; the child carries the content."""
+    img = Image.new("RGB", (400, 30 * 40 + 20), "white")
+    draw = ImageDraw.Draw(img)
+    dom = []
+    for i in range(30):
+        y = 10 + i * 40
+        draw.rectangle([10, y, 389, y + 29], fill=(40, 80 + i * 4, 160))
+        draw.text((20, y + 8), f"Row {i}", fill="white")
+        if i in changed:
+            draw.rectangle([200, y, 389, y + 29], fill="yellow")
+        wrapper_id, child_id = f"w_{i}", f"c_{i}"
+        dom.append({"id": wrapper_id, "tag": "div", "x": 10, "y": y, "width": 380, "height": 30})
+        dom.append({"id": child_id, "tag": "div", "x": 10, "y": y, "width": 380, "height": 30,
+                    "parent_id": wrapper_id})
+    return {"image": img, "dom": dom}
+
+
+def _compare(comparator, prev, curr):
+    # compare() builds DOM maps in place, so give each run its own DOM copies
+    fresh = lambda page: {"image": page["image"], "dom": [dict(el) for el in page["dom"]]}
+    return comparator.compare(fresh(prev), fresh(curr))
+
+
+def test_parallel_matches_serial_with_shared_rects():
+    prev = _wrapper_child_page(changed=set())
+    curr = _wrapper_child_page(changed={0, 3, 7, 12, 21})
+
+    serial = _compare(VisualComparator(*fake_models(), detect_shifts=False), prev, curr)
+    with ParallelComparator(fake_models, workers=2, detect_shifts=False) as comparator:
+        parallel = _compare(comparator, prev, curr)
+
+    assert serial["scores"].to_records() == parallel["scores"].to_records()
+    assert serial["summary"]["changed_regions"] == parallel["summary"]["changed_regions"] > 0
+    for column in ("bbox", "tier", "changed"):
+        assert np.array_equal(serial["raw_scores"][column], parallel["raw_scores"][column])
+    for column in ("lpips", "clip"):
+        assert np.array_equal(serial["raw_scores"][column], parallel["raw_scores"][column], equal_nan=True)
+
+
+def test_second_pass_updates_the_verified_element():
+    prev = _wrapper_child_page(changed=set())
+    curr = _wrapper_child_page(changed={5})
+    result = _compare(VisualComparator(*fake_models(), detect_shifts=False), prev, curr)
+
+    records = result["scores"].to_records()
+    wrapper, child = records[10], records[11]
+    # The wrapper's child is masked in pass 2, so only the child keeps the change
+    assert wrapper["Change_Flag"] == 0 and child["Change_Flag"] == 1
+
+
+def _repeated_rows_page(rows, changed):
+    img = Image.new("RGB", (400, rows * 40 + 20), "white")
+    draw = ImageDraw.Draw(img)
+    dom = []
+    for i in range(rows):
+        y = 10 + i * 40
+        draw.rectangle([10, y, 389, y + 29], fill=(40, 80, 160))
+        draw.text((20, y + 8), "Item", fill="white")
+        if changed:
+            draw.rectangle([200, y, 300, y + 29], fill="yellow")
+        dom.append({"id": f"el_{i}", "tag": "div", "x": 10, "y": y, "width": 380, "height": 30})
+    return {"image": img, "dom": dom}
+
+
+def test_repeated_rows_are_scored_once_across_workers():
+    prev, curr = _repeated_rows_page(16, changed=False), _repeated_rows_page(16, changed=True)
+
+    serial = _compare(VisualComparator(*fake_models(), detect_shifts=False), prev, curr)
+    with ParallelComparator(fake_models, workers=4, detect_shifts=False) as comparator:
+        parallel = _compare(comparator, prev, curr)
+
+    assert serial["summary"]["changed_regions"] == parallel["summary"]["changed_regions"] == 16
+    assert parallel["summary"]["tier_hits"] == serial["summary"]["tier_hits"]
+    assert parallel["summary"]["dedup_hits"] == serial["summary"]["dedup_hits"] == 15
+
+
+def test_custom_cascade_is_forwarded_to_workers():
+    prev, curr = _wrapper_child_page(changed=set()), _wrapper_child_page(changed={2, 9})
+    cascade = DetectorCascade([ExactHashTier(), LPIPSTier(FakeLPIPS(), thresh=0.5)])
+
+    serial = _compare(VisualComparator(None, None, cascade=cascade, detect_shifts=False), prev, curr)
+    with ParallelComparator(fake_models, workers=2, cascade=cascade, detect_shifts=False) as comparator:
+        parallel = _compare(comparator, prev, curr)
+
+    assert set(parallel["summary"]["tier_hits"]) == {"hash", "lpips"}
+    assert parallel["summary"]["tier_hits"] == serial["summary"]["tier_hits"]
+    assert parallel["scores"].to_records() == serial["scores"].to_records()
+
+
+def test_unpicklable_cascade_is_rejected():
+    class Local:
+        name = "local"
+
+        def evaluate(self, crop_prev, crop_curr):
+            return None, {}
+
+    with pytest.raises(ValueError):
+        ParallelComparator(fake_models, workers=1, cascade=DetectorCascade([Local()]))
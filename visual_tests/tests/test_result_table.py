@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from helpers import FakeCLIP, FakeLPIPS
+from result_table import ResultTable
+from utils import mark_issues
+
+
+def _record(flag, bbox=(0, 0, 10, 10), lpips=None):
+    return {"tag": "div", "bbox": bbox, "LPIPS": lpips, "Change_Flag": flag, "LPIPS_Detects_Change": flag}
+
+
+def test_records_round_trip_as_plain_python():
+    records = [_record(1, lpips=0.1234), _record(0)]
+    table = ResultTable(records)
+
+    assert table.to_records() == records
+    assert json.loads(json.dumps(table.to_records()))[0]["bbox"] == [0, 0, 10, 10]
+    assert np.isnan(table.numeric("LPIPS")[1])
+
+
+def test_filtering_and_summary_are_columnar():
+    table = ResultTable([_record(1), _record(0), _record(1, bbox=(5, 5, 9, 9))])
+
+    changed = table.changed()
+    assert len(changed) == 2 and changed.column("bbox") == [(0, 0, 10, 10), (5, 5, 9, 9)]
+    assert table.summary() == {"total_regions": 3, "changed_regions": 2, "change_percent": 66.67}
+
+
+def test_clear_changes_updates_flags_and_model_columns():
+    table = ResultTable([_record(1), _record(1), _record(0)])
+    table.clear_changes(np.array([True, False, False]))
+
+    assert table.summary()["changed_regions"] == 1
+    assert table.column("LPIPS_Detects_Change") == [0, 1, 0]
+    assert len(table.changed()) == 1
+
+
+def test_mask_length_mismatch_raises():
+    table = ResultTable([_record(1), _record(0)])
+    with pytest.raises(ValueError):
+        table[np.array([True])]
+    with pytest.raises(ValueError):
+        table.clear_changes(np.array([True, False, True]))
+
+
+def test_mark_issues_summary_excludes_suppressed_parents():
+    img = Image.new("RGB", (200, 200), "white")
+    changed = img.copy()
+    ImageDraw.Draw(changed).rectangle([40, 40, 80, 80], fill="black")
+    dom = [{"tag": "section", "x": 0, "y": 0, "width": 200, "height": 200},
+           {"tag": "div", "x": 20, "y": 20, "width": 100, "height": 100}]
+
+    result = mark_issues({"image": changed, "dom": dom}, {"image": img, "dom": dom},
+                         FakeLPIPS(), FakeCLIP(), lpips_thresh=0.001, clip_thresh=0.999)
+
+    assert result["summary"]["changed_regions"] == 1
+    assert [row["tag"] for row in result["scores"].changed()] == ["div"]
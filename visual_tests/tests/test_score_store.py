@@ -0,0 +1,62 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+from diff import VisualComparator
+from helpers import fake_models
+from score_store import build_score_columns, load_scores, reevaluate, save_scores
+
+# Pixel deltas of the changed rows: with the fake models these land on both sides of the thresholds
+DELTAS = {2: 10, 5: 25, 8: 40, 11: 60, 14: 95}
+
+
+def _graded_page(changed):
+    """Rows wrapped in same-rect containers; changed rows get a block brightened by DELTAS[i]."""
+    img = Image.new("RGB", (400, 20 * 40 + 20), "white")
+    draw = ImageDraw.Draw(img)
+    dom = []
+    for i in range(20):
+        y = 10 + i * 40
+        base = (40, 60 + i * 4, 120)
+        draw.rectangle([10, y, 389, y + 29], fill=base)
+        draw.text((20, y + 8), f"Row {i}", fill="white")
+        if i in changed:
+            draw.rectangle([200, y, 299, y + 29], fill=tuple(c + DELTAS[i] for c in base))
+        dom.append({"id": f"w_{i}", "tag": "section", "x": 10, "y": y, "width": 380, "height": 30})
+        dom.append({"id": f"c_{i}", "tag": "div", "x": 10, "y": y, "width": 380, "height": 30,
+                    "parent_id": f"w_{i}"})
+    return {"image": img, "dom": dom}
+
+
+def _compare(lpips_thresh, clip_thresh):
+    prev, curr = _graded_page(changed=set()), _graded_page(changed=set(DELTAS))
+    comparator = VisualComparator(*fake_models(), lpips_thresh=lpips_thresh, clip_thresh=clip_thresh,
+                                  detect_shifts=False, full_model_scores=True)
+    return comparator.compare(prev, curr)
+
+
+def test_reevaluate_matches_fresh_compare():
+    stored = _compare(0.01, 0.995)["raw_scores"]
+    for lpips_thresh, clip_thresh in ((0.02, 0.99), (0.05, 0.97), (0.5, 0.5)):
+        fresh = _compare(lpips_thresh, clip_thresh)
+        result = reevaluate(stored, lpips_thresh, clip_thresh)
+
+        assert result["summary"]["stale_regions"] == 0
+        assert result["changed"].astype(int).tolist() == fresh["scores"].column("Change_Flag")
+        assert result["summary"]["changed_regions"] == fresh["summary"]["changed_regions"]
+
+
+def test_reevaluate_sees_a_real_threshold_change():
+    stored = _compare(0.01, 0.995)
+    loose = reevaluate(stored["raw_scores"], 0.05, 0.97)["summary"]["changed_regions"]
+    assert 0 < loose < stored["summary"]["changed_regions"]
+
+
+def test_long_tag_and_tier_names_survive_round_trip(tmp_path):
+    row = {"index": 0, "tag": "my-pricing-card-item-with-a-long-name", "bbox": (0, 0, 40, 40), "size": (40, 40),
+           "lpips": [0.2, None], "clip": [0.9, None], "tier": ["custom-perceptual", None], "changed": [True, None]}
+    path = str(tmp_path / "scores.npz")
+    save_scores(path, build_score_columns([row], 0.03, 0.98, 20))
+    columns = load_scores(path)
+
+    assert columns["tag"].tolist() == [row["tag"]]
+    assert columns["tier"][0].tolist() == ["custom-perceptual", ""]
@@ -46,7 +46,8 @@ def get_git_commits(max_count=10):
 def mark_issues(curr_pair, prev_pair, lpips_model, clip_model,
                 lpips_thresh=0.03, clip_thresh=0.98, min_size=20):
     from PIL import ImageDraw
-    import pandas as pd
+    from result_table import ResultTable
+    from score_store import suppress_contained
 
     def is_bbox_contained(bigger, smaller):
         x1_b, y1_b, x2_b, y2_b = bigger
@@ -106,43 +107,21 @@ def mark_issues(curr_pair, prev_pair, lpips_model, clip_model,
             print(f"[!] Skipped region due to error: {e}")
             continue
 
-    df_scores = pd.DataFrame(results)
+    df_scores = ResultTable(results)
 
     # --- containment filter (keep leaves) ---
-        # --- Deduplicate parent containers if child is already flagged ---
-    changed = [r for r in results if r["Change_Flag"] == 1]
-
-    # Sort by area (smallest first)
-    changed_sorted = sorted(changed, key=lambda r: (r["bbox"][2] - r["bbox"][0]) * (r["bbox"][3] - r["bbox"][1]))
-
-    suppressed = set()
-    for i, inner in enumerate(changed_sorted):
-        xi1, yi1, xi2, yi2 = inner["bbox"]
-        for j, outer in enumerate(changed_sorted[i+1:], start=i+1):
-            xo1, yo1, xo2, yo2 = outer["bbox"]
-
-            # Check if inner is fully inside outer
-            if xo1 <= xi1 and yo1 <= yi1 and xo2 >= xi2 and yo2 >= yi2:
-                suppressed.add(j)
-
-    for idx in suppressed:
-        results_idx = results.index(changed_sorted[idx])
-        results[results_idx]["Change_Flag"] = 0
-        results[results_idx]["LPIPS_Detects_Change"] = 0
-        results[results_idx]["CLIP_Detects_Change"] = 0
-
+    # Deduplicate parent containers if a child inside them is already flagged
+    if not df_scores.empty:
+        flagged = df_scores.flags == 1
+        df_scores.clear_changes(flagged & ~suppress_contained(df_scores.array("bbox"), flagged))
 
     # Draw only filtered changes
-    for i, row in df_scores[df_scores["Change_Flag"] == 1].iterrows():
+    for row in df_scores.changed():
         x1, y1, x2, y2 = row["bbox"]
         prev_draw.rectangle([x1, y1, x2, y2], outline="red", width=2)
         curr_draw.rectangle([x1, y1, x2, y2], outline="red", width=2)
 
-    summary = {
-        "total_regions": len(df_scores),
-        "changed_regions": int(df_scores["Change_Flag"].sum()) if not df_scores.empty else 0,
-        "change_percent": round(df_scores["Change_Flag"].mean() * 100, 2) if not df_scores.empty else 0.0
-    }
+    summary = df_scores.summary()
 
     print(f"[✓] Compared {len(df_scores)} DOM regions. Changes: {summary['changed_regions']}")
 
@@ -1,17 +1,37 @@
+import os
 from datetime import datetime
-from model_wrappers import LPIPSWrapper, CLIPWrapper
+from typing import Optional
+from detectors import LazyModel
 from utils import (
     # mark_issues,
     encode_image_to_base64
 )
 from diff import VisualComparator
-from commit_tracker import get_next_commit_pair
+from commit_tracker import get_next_commit_pair, BASELINE_DIR
+from score_store import save_scores
 
 
-def run_visual_test():
+def _load_lpips():
+    # Backend (eager/torchscript/onnx, int8, threads) comes from VT_BACKEND* env vars
+    from inference_backends import load_lpips
+    return load_lpips()
+
+
+def _load_clip():
+    from inference_backends import load_clip
+    return load_clip()
+
+
+def run_visual_test(full_model_scores: Optional[bool] = None):
     """
     Runs the visual diff test using LPIPS and CLIP.
 
+    Args:
+        full_model_scores (bool | None): also score CLIP on elements LPIPS already rejected,
+            so the persisted raw scores re-evaluate exactly at any threshold. Costs one extra
+            CLIP call per LPIPS-rejected element. Defaults to the VT_FULL_MODEL_SCORES env var
+            (off); without it, re-evaluation reports those elements as stale.
+
     Returns:
         Tuple:
             result_dict (dict | None): structured visual test result if successful.
@@ -37,16 +57,18 @@ def run_visual_test():
 
         print(f"[✓] Comparing commits:\n     → Previous: {prev}\n     → Current : {curr}")
 
-        # Step 3: Load models
-        print("[•] Loading LPIPS and CLIP models...")
-        lpips = LPIPSWrapper()
-        clip = CLIPWrapper()
-        print("[✓] Models initialized.")
+        # Step 3: Load models (deferred until a crop pair actually reaches a model tier)
+        lpips = LazyModel(_load_lpips)
+        clip = LazyModel(_load_clip)
+        print("[✓] Models registered (loaded on first use).")
         
         # Step 4: Run visual comparison
+        if full_model_scores is None:
+            full_model_scores = os.environ.get("VT_FULL_MODEL_SCORES", "").lower() in ("1", "true", "yes", "on")
         comparator = VisualComparator(
             lpips_model=lpips,
-            clip_model=clip
+            clip_model=clip,
+            full_model_scores=full_model_scores
         )
         print("[•] Running visual comparison...")
         # result = mark_issues(curr_data, prev_data, lpips, clip)
@@ -54,6 +76,12 @@ def run_visual_test():
         
         print("[✓] Visual comparison completed.")
 
+        # Keep raw scores so threshold changes can be re-evaluated without re-running models
+        try:
+            save_scores(str(BASELINE_DIR / curr / f"test_home_page_scores_vs_{prev}.npz"), result["raw_scores"])
+        except Exception as e:
+            print(f"[!] Could not persist raw scores: {e}")
+
         # Step 5: Validate diff result
         if not result.get("highlighted_prev") or not result.get("highlighted_curr"):
             return None, "Highlighted diff images could not be generated."
@@ -87,7 +115,7 @@ def run_visual_test():
         # Step 7: Return result
         return {
             "summary": result.get("summary", "No summary provided."),
-            "scores": result.get("scores", {}),
+            "scores": result["scores"].to_records() if "scores" in result else [],
             "img_prev_base64": base64_prev,
             "img_curr_base64": base64_curr,
             "segments": segments_output
@@ -1,10 +1,20 @@
-import { StrictMode } from 'react'
+import { StrictMode, useEffect } from 'react'
 import { createRoot } from 'react-dom/client'
 import './index.css'
 import App from './App.jsx'
 
+// Explicit readiness signal for visual test capture (see visual_tests/config.py READY_SELECTOR)
+function ReadyMarker({ children }) {
+  useEffect(() => {
+    document.getElementById('root').dataset.vtReady = 'true'
+  }, [])
+  return children
+}
+
 createRoot(document.getElementById('root')).render(
   <StrictMode>
-    <App />
+    <ReadyMarker>
+      <App />
+    </ReadyMarker>
   </StrictMode>,
 )